@@ -5,7 +5,8 @@ Provides user-friendly error messages and structured error logging.
 """
 
 import logging
-from enum import Enum
+import re
+from functools import lru_cache
 from typing import Any
 
 from spotipy.exceptions import SpotifyException
@@ -13,8 +14,11 @@ from spotipy.exceptions import SpotifyException
 logger = logging.getLogger(__name__)
 
 
-class ErrorType(Enum):
-    """Error classification types for better user messaging."""
+class ErrorType:
+    """Error classification types for better user messaging.
+
+    Plain string constants rather than an Enum to keep classification cheap.
+    """
     RATE_LIMIT = "rate_limit"
     AUTHENTICATION = "authentication"
     SERVER_ERROR = "server_error"
@@ -33,8 +37,47 @@ USER_FRIENDLY_MESSAGES = {
     ErrorType.UNKNOWN: "An unexpected error occurred. Please try again.",
 }
 
+# Spotify server errors; worth retrying with backoff (see rate_limiter)
+SERVER_ERROR_STATUSES = frozenset((500, 502, 503, 504))
+
+# HTTP status codes with a dedicated classification; other 4xx fall back to CLIENT_ERROR
+_STATUS_TO_TYPE = {
+    429: ErrorType.RATE_LIMIT,
+    401: ErrorType.AUTHENTICATION,
+    **dict.fromkeys(SERVER_ERROR_STATUSES, ErrorType.SERVER_ERROR),
+}
+
+# Log level, message and exc_info flag by error type; other types log as errors.
+# Tracebacks are only formatted for unexpected errors, not predictable 429/5xx responses.
+_LOG_SETTINGS_BY_TYPE = {
+    ErrorType.RATE_LIMIT: (logging.WARNING, "Spotify API error", False),
+    ErrorType.SERVER_ERROR: (logging.WARNING, "Spotify API error", False),
+    ErrorType.AUTHENTICATION: (logging.INFO, "Authentication error", False),
+}
+_DEFAULT_LOG_SETTINGS = (logging.ERROR, "API operation failed", True)
+
+# Keywords in the exception message that indicate a network-related failure
+_NETWORK_ERROR_RE = re.compile(r'connection|network|timeout|dns', re.IGNORECASE)
 
-def classify_spotify_error(error: Exception) -> ErrorType:
+
+def _classify_http_status(status: int) -> str | None:
+    """Classify a Spotify HTTP status, or return None if the status alone is inconclusive."""
+    error_type = _STATUS_TO_TYPE.get(status)
+    if error_type is None and status // 100 == 4:
+        return ErrorType.CLIENT_ERROR
+    return error_type
+
+
+@lru_cache(maxsize=64)
+def _message_for_http_status(status: int) -> str | None:
+    """Cached user-friendly message for a Spotify HTTP status, or None if inconclusive."""
+    error_type = _classify_http_status(status)
+    if error_type is None:
+        return None
+    return USER_FRIENDLY_MESSAGES[error_type]
+
+
+def classify_spotify_error(error: Exception) -> str:
     """
     Classify Spotify API errors into user-friendly categories.
     
@@ -42,21 +85,15 @@ def classify_spotify_error(error: Exception) -> ErrorType:
         error: The exception to classify
         
     Returns:
-        ErrorType enum value
+        ErrorType string constant
     """
     if isinstance(error, SpotifyException):
-        if error.http_status == 429:
-            return ErrorType.RATE_LIMIT
-        elif error.http_status == 401:
-            return ErrorType.AUTHENTICATION
-        elif error.http_status in [500, 502, 503, 504]:
-            return ErrorType.SERVER_ERROR
-        elif 400 <= error.http_status < 500:
-            return ErrorType.CLIENT_ERROR
+        error_type = _classify_http_status(error.http_status)
+        if error_type is not None:
+            return error_type
     
     # Check for network-related errors
-    error_str = str(error).lower()
-    if any(keyword in error_str for keyword in ['connection', 'network', 'timeout', 'dns']):
+    if _NETWORK_ERROR_RE.search(str(error)):
         return ErrorType.NETWORK_ERROR
     
     return ErrorType.UNKNOWN
@@ -72,6 +109,12 @@ def get_user_friendly_error(error: Exception) -> str:
     Returns:
         User-friendly error message string
     """
+    # Status-based messages are cached; only message-keyword classification is uncached
+    if isinstance(error, SpotifyException):
+        message = _message_for_http_status(error.http_status)
+        if message is not None:
+            return message
+
     error_type = classify_spotify_error(error)
     return USER_FRIENDLY_MESSAGES.get(error_type, USER_FRIENDLY_MESSAGES[ErrorType.UNKNOWN])
 
@@ -85,27 +128,25 @@ def log_error_with_context(error: Exception, context: dict[str, Any] | None = No
         context: Additional context information (user_id, playlist_id, operation, etc.)
     """
     error_type = classify_spotify_error(error)
+    level, message, exc_info = _LOG_SETTINGS_BY_TYPE.get(error_type, _DEFAULT_LOG_SETTINGS)
+    if not logger.isEnabledFor(level):
+        return
     
     log_data = {
-        'error_type': error_type.value,
+        'error_type': error_type,
         'error_class': error.__class__.__name__,
         'error_message': str(error),
     }
     
     if isinstance(error, SpotifyException):
-        log_data['http_status'] = getattr(error, 'http_status', None)
-        log_data['spotify_error'] = getattr(error, 'msg', None)
+        log_data['http_status'] = error.http_status
+        log_data['spotify_error'] = error.msg
     
-    if context:
-        log_data.update(context)
+    # Context keys override the base fields; logging iterates extra, so merge into a dict
+    extra = {**log_data, **context} if context else log_data
     
     # Log at appropriate level based on error type
-    if error_type in [ErrorType.RATE_LIMIT, ErrorType.SERVER_ERROR]:
-        logger.warning("Spotify API error", extra=log_data, exc_info=True)
-    elif error_type == ErrorType.AUTHENTICATION:
-        logger.info("Authentication error", extra=log_data)
-    else:
-        logger.error("API operation failed", extra=log_data, exc_info=True)
+    logger.log(level, message, extra=extra, exc_info=exc_info)
 
 
 def is_spotify_api_available(error: Exception) -> bool:
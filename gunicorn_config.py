@@ -0,0 +1,28 @@
+"""
+Gunicorn configuration for production deployments.
+
+Requests spend nearly all of their time waiting on the Spotify API, so each worker
+runs several threads to overlap those waits. Threaded workers are used rather than
+gevent because the app relies on real threading primitives (rate limiter semaphore,
+background executors, shared connection pool) that monkey-patching would swap out.
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+
+# Worker processes; each keeps its own in-memory caches and rate limiter
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+
+# Threads per worker for concurrent I/O-bound requests
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "8"))
+
+# Sorting large playlists issues many sequential API calls
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = 30
+keepalive = 5
+
+accesslog = "-"
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
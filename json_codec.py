@@ -0,0 +1,64 @@
+"""
+JSON encoding shared by token storage and API responses.
+
+Uses orjson when it is installed (the "fast-json" extra) and the standard
+library otherwise; both backends produce the same JSON.
+"""
+
+import json
+from collections.abc import Callable
+from typing import Any
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+
+def dumps(
+    obj: Any,
+    *,
+    sort_keys: bool = False,
+    indent: bool = False,
+    default: Callable[[Any], Any] | None = None,
+) -> bytes:
+    """
+    Serialize an object to UTF-8 encoded JSON.
+
+    Args:
+        obj: Object to serialize
+        sort_keys: Whether to sort dictionary keys
+        indent: Whether to pretty-print with two-space indentation
+        default: Fallback for objects the encoder cannot serialize natively
+
+    Returns:
+        JSON document as bytes
+    """
+    if HAS_ORJSON:
+        # Dates go through default like they do with the stdlib encoder
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=default, option=option)
+
+    return json.dumps(
+        obj, sort_keys=sort_keys, indent=2 if indent else None, default=default
+    ).encode()
+
+
+def loads(data: bytes | str) -> Any:
+    """
+    Deserialize a JSON document.
+
+    Args:
+        data: JSON document as bytes or str
+
+    Returns:
+        Deserialized object
+    """
+    if HAS_ORJSON:
+        return orjson.loads(data)
+    return json.loads(data)
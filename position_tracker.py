@@ -0,0 +1,40 @@
+class PositionTracker:
+    """
+    Track positions excluded from a sequence of fixed initial length.
+
+    Maps original positions to positions among the remaining (not excluded) items
+    in O(log n) per exclusion or lookup, using a Fenwick (binary indexed) tree of
+    exclusion counts over original positions. Excluded items are tracks removed
+    from a playlist when deduplicating, or tracks already placed when sorting.
+    """
+
+    def __init__(self, size):
+        """
+        Initialize tracker for a sequence.
+
+        Args:
+            size: Number of items in the initial sequence
+        """
+        # A plain list on purpose: array.array would be more compact, but it boxes a new
+        # int on every read and is measurably slower for the update/query loops
+        self._tree = [0] * (size + 1)
+        self.excluded_count = 0
+
+    def exclude(self, original_position):
+        """Mark the item at an original position as excluded."""
+        i = original_position + 1
+        tree = self._tree
+        while i < len(tree):
+            tree[i] += 1
+            i += i & -i
+        self.excluded_count += 1
+
+    def current_position(self, original_position):
+        """Return the position of the item at an original position among the remaining items."""
+        excluded_before = 0
+        i = original_position
+        tree = self._tree
+        while i > 0:
+            excluded_before += tree[i]
+            i -= i & -i
+        return original_position - excluded_before
@@ -1,16 +1,24 @@
 import logging
 import random
+import threading
 import time
+from collections import deque
 from collections.abc import Callable
 from functools import wraps
 from typing import Any
 
 from spotipy.exceptions import SpotifyException
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+from error_handler import SERVER_ERROR_STATUSES
+
 logger = logging.getLogger(__name__)
 
+# Number of jitter factors generated per refill of the shared jitter buffer
+_JITTER_BUFFER_SIZE = 2048
+
+# Jitter factors shared by all limiters; deque.popleft() is atomic so threads can draw concurrently
+_JITTER_BUFFER: deque[float] = deque()
+
 class SpotifyRateLimiter:
     """
     Rate limiter for Spotify API calls with exponential backoff and jitter.
@@ -18,14 +26,17 @@ class SpotifyRateLimiter:
     Implements best practices from Spotify API documentation:
     - Exponential backoff with jitter for 429 errors
     - Retry-After header handling
-    - Request throttling to stay within rate limits
+    - Request throttling to stay within rate limits (token bucket shared across threads)
+    - A cap on concurrent in-flight requests
     """
 
     def __init__(self,
                  base_delay: float = 1.0,
                  max_delay: float = 60.0,
                  max_retries: int = 5,
-                 jitter: bool = True):
+                 jitter: bool = True,
+                 max_concurrency: int = 4,
+                 burst: int = 3):
         """
         Initialize rate limiter.
         
@@ -33,18 +44,33 @@ class SpotifyRateLimiter:
             base_delay: Base delay in seconds for exponential backoff
             max_delay: Maximum delay in seconds
             max_retries: Maximum number of retry attempts
-            jitter: Whether to add jitter to backoff delays
+            jitter: Whether to apply full jitter (0..delay) to backoff delays
+            max_concurrency: Maximum number of requests in flight at once
+            burst: Number of requests that may start back-to-back after an idle period
         """
         self.base_delay = base_delay
         self.max_delay = max_delay
         self.max_retries = max_retries
         self.jitter = jitter
-        self.last_request_time = 0
         self.min_request_interval = 1.0 / 3.0  # ~3 requests/second safe limit
 
+        # Concurrency cap: permits are held only while a request is in flight
+        self._concurrency = threading.BoundedSemaphore(max_concurrency)
+
+        # Token bucket refilling at one token per min_request_interval
+        self._bucket_lock = threading.Lock()
+        self._bucket_capacity = float(burst)
+        self._bucket_tokens = float(burst)
+        self._bucket_last = time.monotonic()
+
+        # Precomputed capped backoff delays: min(base_delay * (2 ^ attempt), max_delay)
+        self._backoff_delays = tuple(
+            min(base_delay * (1 << attempt), max_delay) for attempt in range(max_retries + 1)
+        )
+
     def _calculate_delay(self, attempt: int, retry_after: int | None = None) -> float:
         """
-        Calculate delay using exponential backoff with optional jitter.
+        Calculate delay using exponential backoff with optional full jitter.
         
         Args:
             attempt: Current retry attempt number (0-based)
@@ -54,34 +80,52 @@ class SpotifyRateLimiter:
             Delay in seconds
         """
         if retry_after:
-            # Use Retry-After header if provided
-            delay = retry_after
-        else:
-            # Exponential backoff: base_delay * (2 ^ attempt)
-            delay = self.base_delay * (2 ** attempt)
+            # Use Retry-After header if provided, capped at max_delay.
+            # Server-specified delays are honoured as-is, without jitter.
+            return min(retry_after, self.max_delay)
 
-        # Cap at max_delay
-        delay = min(delay, self.max_delay)
+        if attempt < len(self._backoff_delays):
+            # Exponential backoff from the precomputed table
+            delay = self._backoff_delays[attempt]
+        else:
+            delay = min(self.base_delay * (1 << attempt), self.max_delay)
 
-        # Add jitter to prevent thundering herd
+        # Full jitter (0..delay) to spread out retries and prevent thundering herd.
+        # A near-zero delay is still spaced out by _throttle_request.
         if self.jitter:
-            jitter_range = delay * 0.1  # 10% jitter
-            delay += random.uniform(-jitter_range, jitter_range)
+            delay *= self._next_jitter_factor()
+
+        return delay
 
-        return max(0, delay)
+    @staticmethod
+    def _next_jitter_factor() -> float:
+        """Return a uniform factor in [0, 1) from a pre-generated buffer, refilling it in bulk."""
+        buffer = _JITTER_BUFFER
+        try:
+            return buffer.popleft()
+        except IndexError:
+            buffer.extend(random.random() for _ in range(_JITTER_BUFFER_SIZE))
+            return buffer.popleft()
 
     def _throttle_request(self):
         """Throttle requests to stay within safe rate limits."""
-        current_time = time.time()
-        time_since_last = current_time - self.last_request_time
-
-        if time_since_last < self.min_request_interval:
-            sleep_time = self.min_request_interval - time_since_last
+        with self._bucket_lock:
+            # Monotonic clock is immune to wall-clock adjustments
+            current_time = time.monotonic()
+            elapsed = current_time - self._bucket_last
+            self._bucket_last = current_time
+            tokens = min(
+                self._bucket_capacity,
+                self._bucket_tokens + elapsed / self.min_request_interval,
+            )
+            # Reserve a token; a negative balance queues later callers behind this one
+            self._bucket_tokens = tokens - 1.0
+
+        if tokens < 1.0:
+            sleep_time = (1.0 - tokens) * self.min_request_interval
             logger.debug(f"Throttling request: sleeping {sleep_time:.2f}s")
             time.sleep(sleep_time)
 
-        self.last_request_time = time.time()
-
     def _handle_spotify_exception(self, e: SpotifyException) -> tuple[bool, int | None]:
         """
         Handle Spotify API exceptions and determine if retry is appropriate.
@@ -92,28 +136,27 @@ class SpotifyRateLimiter:
         Returns:
             Tuple of (should_retry, retry_after_seconds)
         """
-        if e.http_status == 429:
+        # Read the status once; every branch below uses the local
+        status = e.http_status
+        if status == 429:
             # Rate limit exceeded
-            retry_after = None
-            if hasattr(e, 'headers') and e.headers:
-                retry_after = e.headers.get('Retry-After')
-                if retry_after:
-                    try:
-                        retry_after = int(retry_after)
-                    except ValueError:
-                        retry_after = None
+            # Malformed or non-integer values are ignored in favour of backoff
+            header = (getattr(e, 'headers', None) or {}).get('Retry-After')
+            retry_after = int(header) if header and header.isdecimal() else None
 
             logger.warning(f"Rate limit exceeded. Retry-After: {retry_after}")
             return True, retry_after
 
-        elif e.http_status in [500, 502, 503, 504]:
+        elif status in SERVER_ERROR_STATUSES:
             # Server errors - retry with backoff
-            logger.warning(f"Server error {e.http_status}: {e!s}")
+            if logger.isEnabledFor(logging.WARNING):
+                logger.warning(f"Server error {status}: {e!s}")
             return True, None
 
         else:
             # Client errors or other issues - don't retry
-            logger.error(f"API error {e.http_status}: {e!s}")
+            if logger.isEnabledFor(logging.ERROR):
+                logger.error(f"API error {status}: {e!s}")
             return False, None
 
     def execute_with_retry(self, func: Callable, *args, **kwargs) -> Any:
@@ -135,11 +178,14 @@ class SpotifyRateLimiter:
 
         for attempt in range(self.max_retries + 1):
             try:
-                # Throttle requests to stay within rate limits
-                self._throttle_request()
+                # Hold a concurrency permit only while the request is in flight,
+                # never during backoff sleeps
+                with self._concurrency:
+                    # Throttle requests to stay within rate limits
+                    self._throttle_request()
 
-                # Execute the function
-                result = func(*args, **kwargs)
+                    # Execute the function
+                    result = func(*args, **kwargs)
 
                 # Success - reset any previous failures
                 if attempt > 0:
@@ -177,15 +223,16 @@ def rate_limited_spotify_call(rate_limiter: SpotifyRateLimiter | None = None):
     Decorator for rate-limited Spotify API calls.
     
     Args:
-        rate_limiter: SpotifyRateLimiter instance. If None, creates default instance.
+        rate_limiter: SpotifyRateLimiter instance. If None, uses the default instance.
     """
-    if rate_limiter is None:
-        rate_limiter = SpotifyRateLimiter()
-
     def decorator(func: Callable) -> Callable:
+        # Resolve the limiter once at decoration time rather than on every call
+        limiter = rate_limiter or _default_rate_limiter
+        execute_with_retry = limiter.execute_with_retry
+
         @wraps(func)
         def wrapper(*args, **kwargs):
-            return rate_limiter.execute_with_retry(func, *args, **kwargs)
+            return execute_with_retry(func, *args, **kwargs)
         return wrapper
     return decorator
 
@@ -3,13 +3,20 @@ OAuth state storage implementations for production and development environments.
 Provides Redis-based storage with automatic fallback to in-memory storage.
 """
 
+import heapq
 import logging
 import os
+import threading
 import time
 from abc import ABC, abstractmethod
+from collections.abc import Iterable
 
 logger = logging.getLogger(__name__)
 
+# Values stored in Redis for OAuth states (client uses decode_responses=True)
+_STATE_TRUE = "1"
+_STATE_FALSE = "0"
+
 
 class OAuthStateStore(ABC):
     """Abstract base class for OAuth state storage."""
@@ -19,6 +26,11 @@ class OAuthStateStore(ABC):
         """Store an OAuth state with optional TTL in seconds."""
         pass
 
+    def set_states(self, states: Iterable[str], value: bool = True, ttl: int = 300) -> None:
+        """Store several OAuth states with the same TTL in seconds."""
+        for state in states:
+            self.set_state(state, value, ttl)
+
     @abstractmethod
     def get_state(self, state: str) -> bool | None:
         """Retrieve an OAuth state. Returns None if not found or expired."""
@@ -29,6 +41,13 @@ class OAuthStateStore(ABC):
         """Delete an OAuth state."""
         pass
 
+    def pop_state(self, state: str) -> bool | None:
+        """Retrieve and delete an OAuth state. Returns None if not found or expired."""
+        value = self.get_state(state)
+        if value is not None:
+            self.delete_state(state)
+        return value
+
     @abstractmethod
     def cleanup(self) -> None:
         """Clean up expired states (if applicable)."""
@@ -51,21 +70,33 @@ class RedisOAuthStateStore(OAuthStateStore):
     def set_state(self, state: str, value: bool = True, ttl: int = 300) -> None:
         """Store an OAuth state with TTL (default 5 minutes)."""
         try:
-            key = f"{self.prefix}{state}"
+            key = self.prefix + state
             logger.info(f"Redis setex: {key}")
-            self.redis.setex(key, ttl, "1" if value else "0")
+            self.redis.setex(key, ttl, _STATE_TRUE if value else _STATE_FALSE)
         except Exception as e:
             logger.error(f"Redis setex failed: {e}")
             raise
 
+    def set_states(self, states: Iterable[str], value: bool = True, ttl: int = 300) -> None:
+        """Store several OAuth states in a single pipelined round trip."""
+        try:
+            stored_value = _STATE_TRUE if value else _STATE_FALSE
+            pipe = self.redis.pipeline(transaction=False)
+            for state in states:
+                pipe.setex(self.prefix + state, ttl, stored_value)
+            pipe.execute()
+        except Exception as e:
+            logger.error(f"Redis pipelined setex failed: {e}")
+            raise
+
     def get_state(self, state: str) -> bool | None:
         """Retrieve an OAuth state."""
         try:
-            key = f"{self.prefix}{state}"
+            key = self.prefix + state
             result = self.redis.get(key)
             if result is None:
                 return None
-            return result == "1"
+            return result == _STATE_TRUE
         except Exception as e:
             logger.error(f"Redis get failed: {e}")
             raise
@@ -73,12 +104,27 @@ class RedisOAuthStateStore(OAuthStateStore):
     def delete_state(self, state: str) -> None:
         """Delete an OAuth state."""
         try:
-            key = f"{self.prefix}{state}"
+            key = self.prefix + state
             self.redis.delete(key)
         except Exception as e:
             logger.error(f"Redis delete failed: {e}")
             raise
 
+    def pop_state(self, state: str) -> bool | None:
+        """Retrieve and delete an OAuth state atomically in a single round trip."""
+        try:
+            key = self.prefix + state
+            with self.redis.pipeline(transaction=True) as pipe:
+                pipe.get(key)
+                pipe.delete(key)
+                result, _ = pipe.execute()
+            if result is None:
+                return None
+            return result == _STATE_TRUE
+        except Exception as e:
+            logger.error(f"Redis get/delete failed: {e}")
+            raise
+
     def cleanup(self) -> None:
         """No cleanup needed - Redis handles expiration automatically."""
         pass
@@ -89,77 +135,120 @@ class InMemoryOAuthStateStore(OAuthStateStore):
 
     def __init__(self):
         """Initialize in-memory store with expiration tracking."""
-        self.states: dict[str, dict[str, any]] = {}
-        self._last_cleanup = time.time()
+        # state -> (expires_at, value), using the monotonic clock
+        self.states: dict[str, tuple[float, bool]] = {}
+        # Min-heap of (expires_at, state) so expired states are evicted in expiry order
+        self._expiry_heap: list[tuple[float, str]] = []
+        # Request threads and the background state writer share the dict and heap
+        self._lock = threading.Lock()
 
     def set_state(self, state: str, value: bool = True, ttl: int = 300) -> None:
         """Store an OAuth state with expiration time."""
-        self.states[state] = {
-            'value': value,
-            'expires_at': time.time() + ttl
-        }
-        # Periodic cleanup every 60 seconds
-        if time.time() - self._last_cleanup > 60:
-            self.cleanup()
+        with self._lock:
+            now = time.monotonic()
+            expires_at = now + ttl
+            self.states[state] = (expires_at, value)
+            heapq.heappush(self._expiry_heap, (expires_at, state))
+            # Amortized cleanup: only pops states that have already expired
+            self._evict_expired(now)
 
     def get_state(self, state: str) -> bool | None:
         """Retrieve an OAuth state if not expired."""
-        if state not in self.states:
-            return None
+        with self._lock:
+            state_data = self.states.get(state)
+            if state_data is None:
+                return None
 
-        state_data = self.states[state]
-        if time.time() > state_data['expires_at']:
-            # State expired
-            del self.states[state]
-            return None
+            expires_at, value = state_data
+            if time.monotonic() > expires_at:
+                # State expired
+                del self.states[state]
+                return None
 
-        return state_data['value']
+            return value
 
     def delete_state(self, state: str) -> None:
         """Delete an OAuth state."""
-        self.states.pop(state, None)
+        with self._lock:
+            self.states.pop(state, None)
+
+    def pop_state(self, state: str) -> bool | None:
+        """Retrieve and delete an OAuth state if not expired."""
+        with self._lock:
+            state_data = self.states.pop(state, None)
+        if state_data is None or time.monotonic() > state_data[0]:
+            return None
+        return state_data[1]
 
     def cleanup(self) -> None:
         """Remove all expired states."""
-        current_time = time.time()
-        expired_states = [
-            state for state, data in self.states.items()
-            if current_time > data['expires_at']
-        ]
-        for state in expired_states:
-            del self.states[state]
-        self._last_cleanup = current_time
+        with self._lock:
+            self._evict_expired(time.monotonic())
+
+    def _evict_expired(self, now: float) -> None:
+        """Pop expired heap entries, deleting states whose latest expiry has passed (lock held)."""
+        heap = self._expiry_heap
+        while heap and heap[0][0] < now:
+            expires_at, state = heapq.heappop(heap)
+            # Skip stale entries for states that were deleted or set again since
+            state_data = self.states.get(state)
+            if state_data is not None and state_data[0] == expires_at:
+                del self.states[state]
+
+
+# Process-wide store resolved on first use; the backend choice lasts for the process lifetime
+_oauth_state_store: OAuthStateStore | None = None
+_oauth_state_store_lock = threading.Lock()
 
 
 def create_oauth_state_store() -> OAuthStateStore:
     """
     Factory function to create appropriate OAuth state store.
+
+    The store is created once per process; subsequent calls return the same instance.
     
     Returns:
         RedisOAuthStateStore if Redis is available, otherwise InMemoryOAuthStateStore
     """
+    global _oauth_state_store
+
+    if _oauth_state_store is not None:
+        return _oauth_state_store
+
+    with _oauth_state_store_lock:
+        if _oauth_state_store is None:
+            _oauth_state_store = _build_oauth_state_store()
+        return _oauth_state_store
+
+
+def _build_oauth_state_store() -> OAuthStateStore:
+    """Select and verify the OAuth state store backend."""
     redis_url = os.getenv('REDIS_URL')
 
-    if redis_url:
-        try:
-            import redis
-            # Create Redis client
-            client = redis.from_url(redis_url, decode_responses=True)
-            # Test connection
-            client.ping()
-            # Test a real operation to verify Redis actually works
-            test_key = "test_connection"
-            client.set(test_key, "test_value", ex=10)
-            result = client.get(test_key)
-            client.delete(test_key)
-            if result != "test_value":
-                raise Exception("Redis test operation failed")
-            logger.info("Using Redis for OAuth state storage - connection verified")
-            return RedisOAuthStateStore(client)
-        except ImportError:
-            logger.warning("Redis package not installed. Install with: pip install redis")
-        except Exception as e:
-            logger.warning(f"Failed to connect to Redis: {e}. Falling back to in-memory storage")
+    if not redis_url:
+        logger.info("Using in-memory OAuth state storage")
+        return InMemoryOAuthStateStore()
+
+    try:
+        # Imported lazily so deployments without REDIS_URL never load redis
+        import redis
+        # Create Redis client
+        client = redis.from_url(redis_url, decode_responses=True)
+        # Test a real operation to verify Redis actually works (one round trip)
+        test_key = "test_connection"
+        with client.pipeline(transaction=True) as pipe:
+            pipe.set(test_key, "test_value", ex=10)
+            pipe.get(test_key)
+            pipe.delete(test_key)
+            _, result, _ = pipe.execute()
+        if result != "test_value":
+            raise Exception("Redis test operation failed")
+        logger.info("Using Redis for OAuth state storage - connection verified")
+        return RedisOAuthStateStore(client)
+    except ImportError:
+        logger.warning("Redis package not installed. Install with: pip install redis")
+    except Exception as e:
+        logger.warning(f"Failed to connect to Redis: {e}. Falling back to in-memory storage")
 
     logger.info("Using in-memory OAuth state storage")
     return InMemoryOAuthStateStore()
@@ -1,66 +1,155 @@
 import logging
+import sys
 from collections import defaultdict
+
+from spotipy.exceptions import SpotifyException
+
+from position_tracker import PositionTracker
 from rate_limiter import rate_limited_call
+from spotify_auth import get_playlist_items
+
+# Re-fetch the playlist snapshot_id at most every this many operations; in between,
+# the snapshot_id returned by each mutation is trusted
+SNAPSHOT_CHECK_INTERVAL = 25
 
+# Maximum number of tracks the Spotify API accepts in one playlist removal request
+MAX_TRACKS_PER_REQUEST = 100
 
-def simulate_remove_positions(playlist_simulation, positions_to_remove):
+# Statuses returned when removal positions no longer match the playlist; the batch is
+# re-planned from a fresh fetch of the playlist and retried once
+REPLAN_STATUSES = frozenset((400, 404))
+
+
+def describe_track(position, track):
     """
-    Remove tracks at specified positions from playlist simulation.
-    Returns new playlist simulation with tracks removed.
+    Build the summary of a playlist track used in duplicate reports.
     
     Args:
-        playlist_simulation: List of URIs representing playlist
-        positions_to_remove: List of positions to remove (will be sorted)
+        position: Position of the track in the playlist
+        track: Spotify track object
     
     Returns:
-        New playlist simulation with specified positions removed
+        Dictionary with position, URI, name, artists and album of the track
+    """
+    artists = track["artists"]
+    all_artists = [artist["name"] for artist in artists] if artists else []
+    return {
+        "position": position,
+        "uri": track["uri"],
+        "name": track["name"],
+        "artist": all_artists[0] if all_artists else "Unknown",
+        "all_artists": all_artists,
+        "album": track["album"]["name"] if track["album"] else "Unknown"
+    }
+
+
+def group_tracks_by_key(available_tracks):
     """
-    # Sort positions in descending order to avoid index shifting issues
-    sorted_positions = sorted(positions_to_remove, reverse=True)
-    new_playlist = playlist_simulation.copy()
+    Group playlist tracks by normalized track name and artists in a single pass.
     
-    for pos in sorted_positions:
-        if 0 <= pos < len(new_playlist):
-            new_playlist.pop(pos)
+    Args:
+        available_tracks: List of (position, track) pairs in playlist order
     
-    return new_playlist
+    Returns:
+        Tuple of (track_positions, uri_counts): track_positions maps each
+        (name, artists) key to its list of (position, uri) in playlist order,
+        uri_counts maps each URI to its number of occurrences
+    """
+    # Plain dicts with get-then-insert: most keys are seen only once, and this
+    # avoids both the defaultdict factory and setdefault's throwaway list
+    track_positions = {}
+    uri_counts = {}
+
+    # Artist (and often track) names repeat across a playlist, so normalize each raw name once.
+    # Interned results let equal keys compare by identity during dict lookups.
+    normalized_names = {}
+
+    def normalize(name):
+        normalized = normalized_names.get(name)
+        if normalized is None:
+            normalized = normalized_names[name] = sys.intern(name.strip().casefold())
+        return normalized
+
+    # Bound methods are looked up once instead of on every track
+    positions_get = track_positions.get
+    counts_get = uri_counts.get
+
+    for position, track in available_tracks:
+        name = track["name"]
+        if not name:
+            continue
+
+        track_name = normalize(name)
+        # Get all artists and sort them for consistent comparison
+        artists = track["artists"]
+        artist_names = sorted([normalize(artist["name"]) for artist in artists]) if artists else []
 
+        # Create a unique key based on track name and all artists
+        track_key = (track_name, tuple(artist_names))
 
-def simulate_add_at_position(playlist_simulation, uri, position):
+        # Full track details are only built later, for keys that turn out to be duplicated
+        uri = track["uri"]
+        occurrences = positions_get(track_key)
+        if occurrences is None:
+            track_positions[track_key] = [(position, uri)]
+        else:
+            occurrences.append((position, uri))
+        uri_counts[uri] = counts_get(uri, 0) + 1
+
+    return track_positions, uri_counts
+
+
+def collect_identical_uri_usage(tracks, track_positions, uri_counts):
     """
-    Add a track URI at specified position in playlist simulation.
+    Collect occurrence details for URIs that appear more than once in a playlist.
+    
+    Identical URIs always share a track key, so only duplicated keys are visited.
     
     Args:
-        playlist_simulation: List of URIs representing playlist
-        uri: Track URI to add
-        position: Position to insert at (0-indexed)
+        tracks: List of playlist items in playlist order
+        track_positions: Mapping of track key to list of (position, uri), as built by group_tracks_by_key
+        uri_counts: Mapping of URI to its number of occurrences
     
     Returns:
-        New playlist simulation with track added
+        Dictionary mapping each repeated URI to its occurrences (position, track_key, name, artist)
     """
-    new_playlist = playlist_simulation.copy()
-    # Ensure position is within bounds
-    position = max(0, min(position, len(new_playlist)))
-    new_playlist.insert(position, uri)
-    return new_playlist
+    uri_usage = defaultdict(list)
+    for track_key, occurrences in track_positions.items():
+        if len(occurrences) < 2:
+            continue
+        for position, uri in occurrences:
+            if uri_counts[uri] > 1:
+                usage = uri_usage[uri]
+                if usage:
+                    # Same URI, same track: reuse the name and artist of its first occurrence
+                    name, artist = usage[0]["name"], usage[0]["artist"]
+                else:
+                    track = tracks[position]["track"]
+                    artists = track["artists"]
+                    name, artist = track["name"], artists[0]["name"] if artists else "Unknown"
+                usage.append({
+                    "position": position,
+                    "track_key": track_key,
+                    "name": name,
+                    "artist": artist
+                })
+    return uri_usage
 
 
-def find_current_positions(playlist_simulation, target_uri):
+def build_uri_index(available_tracks):
     """
-    Find all current positions of a specific URI in playlist simulation.
+    Index the positions of every URI in a playlist.
     
     Args:
-        playlist_simulation: List of URIs representing playlist
-        target_uri: URI to search for
+        available_tracks: List of (position, track) pairs in playlist order
     
     Returns:
-        List of positions where the URI is found
+        Dictionary mapping each URI to the ascending list of positions where it is found
     """
-    positions = []
-    for i, uri in enumerate(playlist_simulation):
-        if uri == target_uri:
-            positions.append(i)
-    return positions
+    uri_index = defaultdict(list)
+    for position, track in available_tracks:
+        uri_index[track["uri"]].append(position)
+    return uri_index
 
 
 def remove_duplicates_from_playlist(sp, playlist_id, dry_run=False, debug=True):
@@ -81,9 +170,12 @@ def remove_duplicates_from_playlist(sp, playlist_id, dry_run=False, debug=True):
     logger = logging.getLogger(__name__)
     if debug:
         logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    # Decide once whether detailed INFO logs would be emitted, so per-track and
+    # per-operation logging costs nothing when they would be discarded
+    verbose = debug and logger.isEnabledFor(logging.INFO)
     
     # Step 1: Get playlist info and initial snapshot
-    if debug:
+    if verbose:
         logger.info(f"Starting duplicate removal for playlist {playlist_id} (dry_run={dry_run})")
     
     playlist_info = rate_limited_call(sp.playlist, playlist_id, fields="snapshot_id,name,tracks.total")
@@ -91,81 +183,80 @@ def remove_duplicates_from_playlist(sp, playlist_id, dry_run=False, debug=True):
     playlist_name = playlist_info["name"]
     total_tracks_count = playlist_info["tracks"]["total"]
     
-    if debug:
+    if verbose:
         logger.info(f"Playlist: '{playlist_name}' ({total_tracks_count} tracks, snapshot: {initial_snapshot})")
     
-    # Step 2: Get the track list of the playlist with rate limiting
-    tracks = []
-    results = rate_limited_call(sp.playlist_items, playlist_id, limit=100)
-    tracks.extend(results["items"])
-
-    # Handle playlists with more than 100 tracks
-    while results["next"]:
-        results = rate_limited_call(sp.next, results)
-        tracks.extend(results["items"])
+    # Step 2: Get the track list of the playlist with rate limiting (pages fetched in parallel)
+    tracks = get_playlist_items(sp, playlist_id)
     
-    if debug:
+    if verbose:
         logger.info(f"Fetched {len(tracks)} tracks from playlist")
 
+    # Unavailable items (no track or URI) are dropped once here; they still occupy a slot
+    # in the playlist, so each track keeps its original position
+    available_tracks = [
+        (position, item["track"])
+        for position, item in enumerate(tracks)
+        if item["track"] and item["track"]["uri"]
+    ]
+
     # Step 3: Identify duplicate tracks by title and artists, save them as dict including position
-    track_positions = {}  # track_key -> list of positions
     duplicate_positions_to_remove = []  # positions to remove, sorted bottom to top
-    uri_usage = defaultdict(list)  # Track URI usage for debugging identical URIs
-
-    for position, item in enumerate(tracks):
-        if item["track"] and item["track"]["name"]:
-            track_name = item["track"]["name"].lower().strip()
-            # Get all artists and sort them for consistent comparison
-            artists = []
-            if item["track"]["artists"]:
-                artists = sorted([artist["name"].lower().strip() for artist in item["track"]["artists"]])
-
-            # Create a unique key based on track name and all artists
-            track_key = f"{track_name}|||{'|||'.join(artists)}"
-
-            if track_key not in track_positions:
-                track_positions[track_key] = []
-
-            track_info = {
-                "position": position,
-                "uri": item["track"]["uri"],
-                "name": item["track"]["name"],
-                "artist": item["track"]["artists"][0]["name"] if item["track"]["artists"] else "Unknown",
-                "all_artists": [artist["name"] for artist in item["track"]["artists"]] if item["track"]["artists"] else [],
-                "album": item["track"]["album"]["name"] if item["track"]["album"] else "Unknown"
-            }
-            
-            track_positions[track_key].append(track_info)
-            
-            # Track URI usage for debugging
-            uri_usage[item["track"]["uri"]].append({
-                "position": position,
-                "track_key": track_key,
-                "name": item["track"]["name"],
-                "artist": item["track"]["artists"][0]["name"] if item["track"]["artists"] else "Unknown"
+    track_positions, uri_counts = group_tracks_by_key(available_tracks)
+
+    # Fast path: a clean playlist needs no removal planning or API mutations.
+    # Identical URIs always share a track key, so there are none to handle either.
+    if all(len(occurrences) == 1 for occurrences in track_positions.values()):
+        if verbose:
+            logger.info("No duplicates found - nothing to remove")
+        
+        result = {
+            "total_tracks": len(tracks),
+            "unique_tracks": len(track_positions),
+            "duplicates_found": 0,
+            "tracks_removed": 0,
+            "duplicate_groups": [],
+            "unique_uri_removals": [],
+            "identical_uri_groups": {},
+            "dry_run": dry_run,
+            "uri_usage": {},
+            "initial_snapshot": initial_snapshot
+        }
+        if dry_run:
+            result["planned_removals"] = []
+        else:
+            result.update({
+                "final_track_count": total_tracks_count,
+                "removal_errors": [],
+                "successful_removals": [],
+                "final_snapshot": initial_snapshot
             })
+        return result
+    
+    # Occurrence details are only kept for URIs that appear more than once
+    uri_usage = collect_identical_uri_usage(tracks, track_positions, uri_counts)
 
     # Debug: Log URI usage patterns
     if debug:
-        identical_uri_cases = {uri: info for uri, info in uri_usage.items() if len(info) > 1}
-        if identical_uri_cases:
-            logger.warning(f"Found {len(identical_uri_cases)} URIs with multiple occurrences:")
-            for uri, occurrences in identical_uri_cases.items():
-                logger.warning(f"  URI {uri}: {len(occurrences)} occurrences")
+        if uri_usage:
+            logger.warning(f"Found {len(uri_usage)} URIs with multiple occurrences:")
+            for uri, occurrences in uri_usage.items():
+                logger.warning("  URI %s: %d occurrences", uri, len(occurrences))
                 for occ in occurrences:
-                    logger.warning(f"    Position {occ['position']}: {occ['name']} - {occ['artist']}")
+                    logger.warning("    Position %d: %s - %s", occ["position"], occ["name"], occ["artist"])
     
     # Find duplicates and mark positions for removal
     duplicate_groups = []
-    for track_key, positions in track_positions.items():
-        if len(positions) > 1:
+    for track_key, occurrences in track_positions.items():
+        if len(occurrences) > 1:
             # This track has duplicates
-            # Sort positions by their position number to keep the first occurrence
-            positions.sort(key=lambda x: x["position"])
+            # Occurrences are collected in playlist order, so the first one is kept
+            positions = [describe_track(position, tracks[position]["track"]) for position, _ in occurrences]
 
-            # Check for identical URIs within this duplicate group
-            uris_in_group = [pos["uri"] for pos in positions]
-            has_identical_uris = len(set(uris_in_group)) < len(uris_in_group)
+            # Check for identical URIs within this duplicate group; every occurrence of a
+            # URI shares its track key, so a repeated URI is repeated within this group
+            uris_in_group = [uri for _, uri in occurrences]
+            has_identical_uris = any(uri_counts[uri] > 1 for uri in uris_in_group)
             
             duplicate_group = {
                 "track_name": positions[0]["name"],
@@ -180,12 +271,12 @@ def remove_duplicates_from_playlist(sp, playlist_id, dry_run=False, debug=True):
             
             duplicate_groups.append(duplicate_group)
             
-            if debug:
-                logger.info(f"Duplicate group: '{positions[0]['name']}' - {positions[0]['artist']}")
-                logger.info(f"  {len(positions)} occurrences at positions: {[pos['position'] for pos in positions]}")
-                logger.info(f"  URIs: {uris_in_group}")
-                logger.info(f"  Has identical URIs: {has_identical_uris}")
-                logger.info(f"  Will keep position {positions[0]['position']}, remove positions {[pos['position'] for pos in positions[1:]]}")
+            if verbose:
+                logger.info("Duplicate group: '%s' - %s", positions[0]["name"], positions[0]["artist"])
+                logger.info("  %d occurrences at positions: %s", len(positions), [pos["position"] for pos in positions])
+                logger.info("  URIs: %s", uris_in_group)
+                logger.info("  Has identical URIs: %s", has_identical_uris)
+                logger.info("  Will keep position %d, remove positions %s", positions[0]["position"], [pos["position"] for pos in positions[1:]])
 
             # Keep the first occurrence (topmost position = lowest position number)
             # Remove all others (positions[1:])
@@ -207,7 +298,7 @@ def remove_duplicates_from_playlist(sp, playlist_id, dry_run=False, debug=True):
     for removal in duplicate_positions_to_remove:
         uri = removal["uri"]
         # Count how many times this URI appears in the ENTIRE playlist
-        total_uri_occurrences = len(uri_usage[uri])
+        total_uri_occurrences = uri_counts[uri]
         
         if total_uri_occurrences > 1:
             # This URI appears multiple times - need special handling
@@ -219,15 +310,15 @@ def remove_duplicates_from_playlist(sp, playlist_id, dry_run=False, debug=True):
     # Sort unique URI removals by position in descending order (bottom to top)
     unique_uri_removals.sort(key=lambda x: x["position"], reverse=True)
     
-    if debug:
+    if verbose:
         logger.info(f"\nRemoval strategy:")
         logger.info(f"  Tracks with unique URIs (position-specific removal): {len(unique_uri_removals)}")
         logger.info(f"  Tracks with identical URIs (remove-all + re-add): {len(identical_uri_groups)} groups")
         for uri, group in identical_uri_groups.items():
-            logger.info(f"    URI {uri}: {len(group)} duplicates to handle")
+            logger.info("    URI %s: %d duplicates to handle", uri, len(group))
     
     if dry_run:
-        if debug:
+        if verbose:
             logger.info("\n=== DRY RUN MODE - No actual changes will be made ===")
             logger.info(f"Would remove {len(duplicate_positions_to_remove)} tracks total:")
             logger.info(f"  - {len(unique_uri_removals)} via position-specific removal")
@@ -271,107 +362,135 @@ def remove_duplicates_from_playlist(sp, playlist_id, dry_run=False, debug=True):
     removal_errors = []
     successful_removals = []
     
-    if debug:
+    if verbose:
         logger.info(f"\n=== Starting actual removal process ===")
     
-    # Create initial playlist simulation (list of URIs)
-    playlist_simulation = [item["track"]["uri"] if item["track"] else None for item in tracks]
-    
-    # Plan all operations using simulation
+    # Plan all operations
     operations_to_execute = []  # List of (operation_type, uri, positions, target_position)
+    planned_specific_removals = []
     
-    if debug:
-        logger.info(f"Created playlist simulation with {len(playlist_simulation)} tracks")
-        logger.info(f"Planning operations for {len(identical_uri_groups)} identical URI groups...")
-    
-    # Process each identical URI group in simulation
-    for uri, removal_group in identical_uri_groups.items():
-        try:
-            # Find current positions of this URI in simulation
-            current_positions = find_current_positions(playlist_simulation, uri)
+    if not identical_uri_groups:
+        # Fast path: with every URI unique, removals planned bottom to top never shift one
+        # another, so the positions from the initial scan are already the current ones
+        for item in unique_uri_removals:
+            planned_specific_removals.append({
+                "uri": item["uri"],
+                "removal_info": item,
+                "current_position": item["position"],
+                "original_position": item["position"]
+            })
+    else:
+        # The simulation only ever removes tracks (a remove-all + re-add leaves the URI in the
+        # slot of its first occurrence), so it is tracked as original positions per URI plus a
+        # tree of removed original positions instead of rescanning a shifting list.
+        uri_index = build_uri_index(available_tracks)
+        removed_positions = PositionTracker(len(tracks))
+    
+        if verbose:
+            logger.info(f"Created playlist simulation with {len(tracks)} tracks")
+            logger.info(f"Planning operations for {len(identical_uri_groups)} identical URI groups...")
+    
+        # Process each identical URI group in simulation
+        for uri, removal_group in identical_uri_groups.items():
+            try:
+                # Find current positions of this URI in simulation
+                original_positions = uri_index.get(uri, [])
+                current_positions = [
+                    removed_positions.current_position(pos) for pos in original_positions
+                ]
             
-            if not current_positions:
-                if debug:
-                    logger.warning(f"URI {uri} not found in simulation - skipping")
-                continue
+                if not current_positions:
+                    if debug:
+                        logger.warning(f"URI {uri} not found in simulation - skipping")
+                    continue
             
-            # Determine position to keep (minimum position)
-            keep_position = min(current_positions)
+                # Determine position to keep (minimum position)
+                keep_position = min(current_positions)
             
-            if debug:
-                track_info = removal_group[0]
-                logger.info(f"\nSimulating URI group: '{track_info['name']}' - {track_info['artist']}")
-                logger.info(f"  URI: {uri}")
-                logger.info(f"  Current positions in simulation: {current_positions}")
-                logger.info(f"  Will keep at position: {keep_position}")
+                if verbose:
+                    track_info = removal_group[0]
+                    logger.info("\nSimulating URI group: '%s' - %s", track_info["name"], track_info["artist"])
+                    logger.info("  URI: %s", uri)
+                    logger.info("  Current positions in simulation: %s", current_positions)
+                    logger.info("  Will keep at position: %d", keep_position)
             
-            # Record operation for execution
-            operations_to_execute.append({
-                "type": "remove_all_readd",
-                "uri": uri,
-                "removal_group": removal_group,
-                "current_positions": current_positions.copy(),
-                "target_position": keep_position
-            })
+                # Record operation for execution
+                operations_to_execute.append({
+                    "type": "remove_all_readd",
+                    "uri": uri,
+                    "removal_group": removal_group,
+                    "current_positions": current_positions.copy(),
+                    "target_position": keep_position
+                })
             
-            # Simulate the operation
-            playlist_simulation = simulate_remove_positions(playlist_simulation, current_positions)
-            playlist_simulation = simulate_add_at_position(playlist_simulation, uri, keep_position)
+                # Simulate the operation: only the first occurrence survives
+                for pos in original_positions[1:]:
+                    removed_positions.exclude(pos)
+                uri_index[uri] = original_positions[:1]
             
-            if debug:
-                logger.info(f"  Simulation updated - playlist now has {len(playlist_simulation)} tracks")
+                if verbose:
+                    logger.info("  Simulation updated - playlist now has %d tracks", len(tracks) - removed_positions.excluded_count)
             
-        except Exception as e:
-            error_msg = f"Error simulating URI group {uri}: {e}"
-            logger.error(error_msg)
-            for item in removal_group:
-                removal_errors.append({
-                    "position": item["position"],
-                    "error": str(e),
-                    "type": "simulation_error"
-                })
+            except Exception as e:
+                error_msg = f"Error simulating URI group {uri}: {e}"
+                logger.error(error_msg)
+                for item in removal_group:
+                    removal_errors.append({
+                        "position": item["position"],
+                        "error": str(e),
+                        "type": "simulation_error"
+                    })
     
-    # Plan unique URI removals
-    current_unique_uri_removals = []
-    for item in unique_uri_removals:
-        # Find current position in simulation
-        current_positions = find_current_positions(playlist_simulation, item["uri"])
-        if current_positions:
-            # Should only be one position for unique URIs
-            current_position = current_positions[0]
-            operations_to_execute.append({
-                "type": "remove_specific",
-                "uri": item["uri"],
-                "removal_info": item,
-                "current_position": current_position,
-                "original_position": item["position"]
-            })
+        # Plan unique URI removals
+        for item in unique_uri_removals:
+            # Find current position in simulation
+            original_positions = uri_index.get(item["uri"])
+            if original_positions:
+                # Should only be one position for unique URIs
+                original_position = original_positions[0]
+                planned_specific_removals.append({
+                    "uri": item["uri"],
+                    "removal_info": item,
+                    "current_position": removed_positions.current_position(original_position),
+                    "original_position": item["position"]
+                })
             
-            # Simulate removal
-            playlist_simulation = simulate_remove_positions(playlist_simulation, [current_position])
-            current_unique_uri_removals.append(item)
-    
-    if debug:
+                # Simulate removal
+                removed_positions.exclude(original_position)
+                uri_index[item["uri"]] = original_positions[1:]
+    
+    # Unique URI removals run bottom to top, so removing one never shifts the positions of
+    # the ones still pending; consecutive removals can share a single request
+    for start in range(0, len(planned_specific_removals), MAX_TRACKS_PER_REQUEST):
+        operations_to_execute.append({
+            "type": "remove_specific_batch",
+            "removals": planned_specific_removals[start:start + MAX_TRACKS_PER_REQUEST]
+        })
+    
+    if verbose:
         logger.info(f"\nSimulation complete. Planned {len(operations_to_execute)} operations:")
         identical_ops = [op for op in operations_to_execute if op["type"] == "remove_all_readd"]
-        unique_ops = [op for op in operations_to_execute if op["type"] == "remove_specific"]
+        batch_ops = [op for op in operations_to_execute if op["type"] == "remove_specific_batch"]
         logger.info(f"  - {len(identical_ops)} identical URI groups (remove-all + re-add)")
-        logger.info(f"  - {len(unique_ops)} unique URI removals")
+        logger.info(f"  - {len(planned_specific_removals)} unique URI removals in {len(batch_ops)} batches")
     
     # Execute all planned operations
-    if debug:
+    if verbose:
         logger.info(f"\n=== Executing planned operations ===")
     
+    verify_snapshot = True
     for i, operation in enumerate(operations_to_execute):
         try:
-            # Check if playlist was modified by someone else
-            current_playlist = rate_limited_call(sp.playlist, playlist_id, fields="snapshot_id")
-            current_snapshot = current_playlist["snapshot_id"]
-            
-            if current_snapshot != initial_snapshot:
-                error_msg = f"Playlist snapshot changed from {initial_snapshot} to {current_snapshot}. Aborting to prevent data loss."
-                logger.error(error_msg)
-                break
+            # Check if playlist was modified by someone else (periodically, and after failures)
+            if verify_snapshot or i % SNAPSHOT_CHECK_INTERVAL == 0:
+                current_playlist = rate_limited_call(sp.playlist, playlist_id, fields="snapshot_id")
+                current_snapshot = current_playlist["snapshot_id"]
+                
+                if current_snapshot != initial_snapshot:
+                    error_msg = f"Playlist snapshot changed from {initial_snapshot} to {current_snapshot}. Aborting to prevent data loss."
+                    logger.error(error_msg)
+                    break
+                verify_snapshot = False
             
             if operation["type"] == "remove_all_readd":
                 # Handle identical URI group
@@ -379,10 +498,10 @@ def remove_duplicates_from_playlist(sp, playlist_id, dry_run=False, debug=True):
                 removal_group = operation["removal_group"]
                 target_position = operation["target_position"]
                 
-                if debug:
+                if verbose:
                     track_info = removal_group[0]
-                    logger.info(f"\nExecuting operation {i+1}/{len(operations_to_execute)}: '{track_info['name']}' - {track_info['artist']}")
-                    logger.info(f"  Removing all occurrences of URI: {uri}")
+                    logger.info("\nExecuting operation %d/%d: '%s' - %s", i + 1, len(operations_to_execute), track_info["name"], track_info["artist"])
+                    logger.info("  Removing all occurrences of URI: %s", uri)
                 
                 # Remove ALL occurrences
                 rate_limited_call(
@@ -392,10 +511,10 @@ def remove_duplicates_from_playlist(sp, playlist_id, dry_run=False, debug=True):
                 )
                 
                 # Re-add at calculated position
-                if debug:
-                    logger.info(f"  Re-adding at position: {target_position}")
+                if verbose:
+                    logger.info("  Re-adding at position: %d", target_position)
                 
-                rate_limited_call(
+                response = rate_limited_call(
                     sp.playlist_add_items,
                     playlist_id,
                     [uri],
@@ -405,64 +524,88 @@ def remove_duplicates_from_playlist(sp, playlist_id, dry_run=False, debug=True):
                 removed_count += len(removal_group)
                 successful_removals.extend(removal_group)
                 
-                if debug:
-                    logger.info(f"  ✓ Successfully processed identical URI group")
+                if verbose:
+                    logger.info("  ✓ Successfully processed identical URI group")
             
-            elif operation["type"] == "remove_specific":
-                # Handle unique URI removal
-                uri = operation["uri"]
-                removal_info = operation["removal_info"]
-                current_position = operation["current_position"]
-                original_position = operation["original_position"]
+            elif operation["type"] == "remove_specific_batch":
+                # Handle a batch of unique URI removals
+                if verbose:
+                    logger.info("\nExecuting operation %d/%d: Remove %d tracks", i + 1, len(operations_to_execute), len(operation["removals"]))
                 
-                if debug:
-                    logger.info(f"\nExecuting operation {i+1}/{len(operations_to_execute)}: Remove '{removal_info['name']}' - {removal_info['artist']}")
-                    logger.info(f"  Original position: {original_position}, Current position: {current_position}")
+                removals = operation["removals"]
+                if verbose:
+                    for removal in removals:
+                        removal_info = removal["removal_info"]
+                        logger.info("  Remove '%s' - %s", removal_info["name"], removal_info["artist"])
+                        logger.info("    Original position: %d, Current position: %d", removal["original_position"], removal["current_position"])
                 
-                # Verify track is at expected position
-                current_tracks = rate_limited_call(sp.playlist_items, playlist_id, limit=1, offset=current_position)
+                # The simulation is authoritative for positions; Spotify rejects the request
+                # if a position no longer holds the expected URI
+                tracks_to_remove = [
+                    {"uri": removal["uri"], "positions": [removal["current_position"]]}
+                    for removal in removals
+                ]
+                verified_removals = [removal["removal_info"] for removal in removals]
                 
-                if not current_tracks["items"]:
-                    error_msg = f"No track found at position {current_position}"
-                    logger.error(error_msg)
-                    removal_errors.append({
-                        "position": current_position,
-                        "error": error_msg,
-                        "type": "position_not_found"
-                    })
-                    continue
+                try:
+                    # Remove the whole batch; positions refer to the snapshot we expect
+                    response = rate_limited_call(
+                        sp.playlist_remove_specific_occurrences_of_items,
+                        playlist_id,
+                        tracks_to_remove,
+                        snapshot_id=initial_snapshot
+                    )
+                except SpotifyException as e:
+                    if e.http_status not in REPLAN_STATUSES:
+                        raise
+                    logger.warning(f"Batch removal rejected ({e.http_status}); re-fetching playlist to re-plan positions")
+                    
+                    # Unique URIs occur once, so their current positions can be looked up directly
+                    current_positions = {
+                        item["track"]["uri"]: position
+                        for position, item in enumerate(get_playlist_items(sp, playlist_id))
+                        if item["track"]
+                    }
+                    tracks_to_remove = []
+                    verified_removals = []
+                    for removal in removals:
+                        position = current_positions.get(removal["uri"])
+                        if position is None:
+                            error_msg = f"Track {removal['uri']} no longer found in playlist"
+                            logger.error(error_msg)
+                            removal_errors.append({
+                                "position": removal["current_position"],
+                                "error": error_msg,
+                                "type": "position_not_found"
+                            })
+                            continue
+                        tracks_to_remove.append({"uri": removal["uri"], "positions": [position]})
+                        verified_removals.append(removal["removal_info"])
+                    
+                    if not tracks_to_remove:
+                        verify_snapshot = True
+                        continue
+                    
+                    response = rate_limited_call(
+                        sp.playlist_remove_specific_occurrences_of_items,
+                        playlist_id,
+                        tracks_to_remove
+                    )
                 
-                current_track = current_tracks["items"][0]["track"]
-                if current_track["uri"] != uri:
-                    error_msg = f"Track mismatch at position {current_position}. Expected {uri}, found {current_track['uri']}"
-                    logger.warning(error_msg)
-                    removal_errors.append({
-                        "position": current_position,
-                        "error": error_msg,
-                        "type": "track_mismatch"
-                    })
-                    continue
+                removed_count += len(verified_removals)
+                successful_removals.extend(verified_removals)
                 
-                # Remove the track
-                rate_limited_call(
-                    sp.playlist_remove_specific_occurrences_of_items,
-                    playlist_id,
-                    [{"uri": uri, "positions": [current_position]}]
-                )
-                
-                removed_count += 1
-                successful_removals.append(removal_info)
-                
-                if debug:
-                    logger.info(f"  ✓ Successfully removed track")
+                if verbose:
+                    logger.info("  ✓ Successfully removed %d tracks", len(verified_removals))
             
-            # Update snapshot for next operation
-            updated_playlist = rate_limited_call(sp.playlist, playlist_id, fields="snapshot_id")
-            initial_snapshot = updated_playlist["snapshot_id"]
+            # Mutation responses carry the playlist's new snapshot_id
+            initial_snapshot = response["snapshot_id"]
             
         except Exception as e:
             error_msg = f"Error executing operation {i+1}: {e}"
             logger.error(error_msg)
+            # The playlist may be partially modified; verify before the next operation
+            verify_snapshot = True
             if operation["type"] == "remove_all_readd":
                 for item in operation["removal_group"]:
                     removal_errors.append({
@@ -471,18 +614,19 @@ def remove_duplicates_from_playlist(sp, playlist_id, dry_run=False, debug=True):
                         "type": "api_error"
                     })
             else:
-                removal_errors.append({
-                    "position": operation["current_position"],
-                    "error": str(e),
-                    "type": "api_error"
-                })
+                for removal in operation["removals"]:
+                    removal_errors.append({
+                        "position": removal["current_position"],
+                        "error": str(e),
+                        "type": "api_error"
+                    })
 
     # Final snapshot check
     final_playlist = rate_limited_call(sp.playlist, playlist_id, fields="snapshot_id,tracks.total")
     final_snapshot = final_playlist["snapshot_id"]
     final_track_count = final_playlist["tracks"]["total"]
     
-    if debug:
+    if verbose:
         logger.info(f"\n=== Removal Complete ===")
         logger.info(f"Successfully removed: {removed_count} tracks")
         logger.info(f"Errors encountered: {len(removal_errors)}")
@@ -19,20 +19,58 @@ import sys
 import argparse
 import re
 import urllib.parse
-from typing import Dict, List, Tuple, Optional
+from typing import TYPE_CHECKING, Dict, List, Tuple, Optional
 
-# Try to import dependencies
-try:
-    from dotenv import load_dotenv
-    HAS_DOTENV = True
-except ImportError:
-    HAS_DOTENV = False
+# Optional dependencies (python-dotenv, redis) are imported only by the checks that use them
+if TYPE_CHECKING:
+    import redis
+
+# Environment variables read by the checks; snapshotted once per validator
+CONFIG_VARS = (
+    'SPOTIFY_CLIENT_ID',
+    'SPOTIFY_CLIENT_SECRET',
+    'REDIRECT_URI',
+    'FLASK_SECRET_KEY',
+    'FLASK_ENV',
+    'HTTPS_ONLY',
+    'SESSION_TYPE',
+    'REDIS_URL',
+    'RENDER',
+    'PORT',
+    'SESSION_COOKIE_SECURE',
+    'SESSION_COOKIE_HTTPONLY',
+    'SESSION_COOKIE_SAMESITE',
+)
+
+# Spotify client IDs and secrets are 32 lowercase hex characters
+_HEX32_RE = re.compile(r'[a-f0-9]{32}\Z')
+
+# Accepted spellings of a true boolean flag (compared lowercased)
+_TRUTHY = frozenset(('true', '1', 'yes', 'on'))
+
+# Valid SESSION_COOKIE_SAMESITE values
+_SAMESITE = frozenset(('Strict', 'Lax', 'None'))
 
-try:
+# redis:// or rediss:// URL: optional credentials (up to the last '@', so passwords may
+# contain '/' or '@'), host (or [IPv6]), port, database, query
+_REDIS_URL_RE = re.compile(
+    r'(rediss?)://(?:[^?#]*@)?(\[[^\]/]+\]|[^:/?#@\[\]]+)(?::(\d+))?(?:/(\d*))?(?:\?[^#]*)?\Z'
+)
+
+# Connection pools per Redis URL, so repeated checks reuse established connections
+_REDIS_POOLS: Dict[str, 'redis.ConnectionPool'] = {}
+
+
+def _get_redis(redis_url: str) -> 'redis.Redis':
+    """Return a Redis client backed by the shared connection pool for a URL."""
     import redis
-    HAS_REDIS = True
-except ImportError:
-    HAS_REDIS = False
+
+    pool = _REDIS_POOLS.get(redis_url)
+    if pool is None:
+        pool = _REDIS_POOLS[redis_url] = redis.ConnectionPool.from_url(
+            redis_url, socket_connect_timeout=5, max_connections=8
+        )
+    return redis.Redis(connection_pool=pool)
 
 
 class ConfigValidator:
@@ -44,8 +82,13 @@ class ConfigValidator:
         self.warnings: List[str] = []
         self.info: List[str] = []
         
-        if env_file and HAS_DOTENV:
+        if env_file:
+            # Raises ImportError without python-dotenv; main() reports it
+            from dotenv import load_dotenv
             load_dotenv(env_file)
+        
+        # Only variables that are actually set, so defaults apply exactly as with os.getenv
+        self.env: Dict[str, str] = {var: os.environ[var] for var in CONFIG_VARS if var in os.environ}
     
     def check_required_vars(self) -> None:
         """Check that all required environment variables are set."""
@@ -57,7 +100,7 @@ class ConfigValidator:
         }
         
         for var, description in required_vars.items():
-            value = os.getenv(var)
+            value = self.env.get(var)
             if not value:
                 self.errors.append(f"Missing required: {var} - {description}")
             elif var == 'FLASK_SECRET_KEY' and len(value) < 32:
@@ -65,34 +108,34 @@ class ConfigValidator:
     
     def check_production_settings(self) -> None:
         """Check production-specific settings."""
-        flask_env = os.getenv('FLASK_ENV', 'development')
+        flask_env = self.env.get('FLASK_ENV', 'development')
         
         if flask_env != 'production':
             self.warnings.append(f"FLASK_ENV is '{flask_env}', should be 'production'")
         
-        https_only = os.getenv('HTTPS_ONLY', 'false').lower()
-        if https_only not in ('true', '1', 'yes', 'on'):
+        https_only = self.env.get('HTTPS_ONLY', 'false').lower()
+        if https_only not in _TRUTHY:
             self.warnings.append("HTTPS_ONLY should be 'true' in production")
         
         # Check redirect URI uses HTTPS
-        redirect_uri = os.getenv('REDIRECT_URI', '')
+        redirect_uri = self.env.get('REDIRECT_URI', '')
         if redirect_uri and not redirect_uri.startswith('https://'):
             self.errors.append(f"REDIRECT_URI must use HTTPS in production: {redirect_uri}")
     
     def check_spotify_config(self) -> None:
         """Validate Spotify configuration."""
-        client_id = os.getenv('SPOTIFY_CLIENT_ID', '')
-        client_secret = os.getenv('SPOTIFY_CLIENT_SECRET', '')
+        client_id = self.env.get('SPOTIFY_CLIENT_ID', '')
+        client_secret = self.env.get('SPOTIFY_CLIENT_SECRET', '')
         
         # Basic format validation
-        if client_id and not re.match(r'^[a-f0-9]{32}$', client_id):
+        if client_id and not _HEX32_RE.match(client_id):
             self.warnings.append(f"SPOTIFY_CLIENT_ID format looks incorrect (expected 32 hex chars)")
         
-        if client_secret and not re.match(r'^[a-f0-9]{32}$', client_secret):
+        if client_secret and not _HEX32_RE.match(client_secret):
             self.warnings.append(f"SPOTIFY_CLIENT_SECRET format looks incorrect (expected 32 hex chars)")
         
         # Check redirect URI format
-        redirect_uri = os.getenv('REDIRECT_URI', '')
+        redirect_uri = self.env.get('REDIRECT_URI', '')
         if redirect_uri:
             try:
                 parsed = urllib.parse.urlparse(redirect_uri)
@@ -105,36 +148,41 @@ class ConfigValidator:
     
     def check_redis_config(self) -> None:
         """Check Redis configuration and connectivity."""
-        session_type = os.getenv('SESSION_TYPE', 'filesystem')
-        redis_url = os.getenv('REDIS_URL', '')
+        session_type = self.env.get('SESSION_TYPE', 'filesystem')
+        redis_url = self.env.get('REDIS_URL', '')
         
         if session_type == 'redis':
             if not redis_url:
                 self.errors.append("SESSION_TYPE is 'redis' but REDIS_URL is not set")
                 return
             
-            # Validate Redis URL format
-            try:
-                parsed = urllib.parse.urlparse(redis_url)
-                if parsed.scheme not in ('redis', 'rediss'):
-                    self.errors.append(f"Invalid Redis URL scheme: {parsed.scheme}")
-                
-                if not HAS_REDIS:
-                    self.warnings.append("Redis package not installed - cannot test connection")
+            # Validate Redis URL format (never echo the URL, it may hold a password)
+            match = _REDIS_URL_RE.match(redis_url)
+            if not match:
+                scheme = redis_url.partition('://')[0] if '://' in redis_url else ''
+                if scheme not in ('redis', 'rediss'):
+                    self.errors.append(f"Invalid Redis URL scheme: {scheme}")
                 else:
-                    # Try to connect
-                    try:
-                        r = redis.from_url(redis_url, socket_connect_timeout=5)
-                        r.ping()
-                        self.info.append(f"✓ Redis connection successful: {parsed.hostname}:{parsed.port or 6379}")
-                    except redis.ConnectionError as e:
-                        self.errors.append(f"Redis connection failed: {e}")
-                    except redis.AuthenticationError as e:
-                        self.errors.append(f"Redis authentication failed: {e}")
-                    except Exception as e:
-                        self.errors.append(f"Redis error: {e}")
+                    self.errors.append("Invalid REDIS_URL format")
+                return
+            _, host, port, _ = match.groups()
+            
+            try:
+                import redis
+            except ImportError:
+                self.warnings.append("Redis package not installed - cannot test connection")
+                return
+            
+            # Try to connect
+            try:
+                _get_redis(redis_url).ping()
+                self.info.append(f"✓ Redis connection successful: {host}:{port or 6379}")
+            except redis.ConnectionError as e:
+                self.errors.append(f"Redis connection failed: {e}")
+            except redis.AuthenticationError as e:
+                self.errors.append(f"Redis authentication failed: {e}")
             except Exception as e:
-                self.errors.append(f"Invalid REDIS_URL format: {e}")
+                self.errors.append(f"Redis error: {e}")
         else:
             if redis_url:
                 self.info.append(f"REDIS_URL is set but SESSION_TYPE is '{session_type}' (not using Redis)")
@@ -143,8 +191,8 @@ class ConfigValidator:
     
     def check_render_specific(self) -> None:
         """Check Render-specific configuration."""
-        is_render = os.getenv('RENDER', '').lower() in ('true', '1', 'yes', 'on')
-        port = os.getenv('PORT')
+        is_render = self.env.get('RENDER', '').lower() in _TRUTHY
+        port = self.env.get('PORT')
         
         if is_render:
             self.info.append("✓ Render environment detected")
@@ -156,17 +204,17 @@ class ConfigValidator:
     def check_security_headers(self) -> None:
         """Check security-related configuration."""
         # Check session configuration
-        cookie_secure = os.getenv('SESSION_COOKIE_SECURE', '').lower()
-        cookie_httponly = os.getenv('SESSION_COOKIE_HTTPONLY', '').lower()
-        cookie_samesite = os.getenv('SESSION_COOKIE_SAMESITE', '')
+        cookie_secure = self.env.get('SESSION_COOKIE_SECURE', '').lower()
+        cookie_httponly = self.env.get('SESSION_COOKIE_HTTPONLY', '').lower()
+        cookie_samesite = self.env.get('SESSION_COOKIE_SAMESITE', '')
         
-        if cookie_secure and cookie_secure not in ('true', '1', 'yes', 'on'):
+        if cookie_secure and cookie_secure not in _TRUTHY:
             self.warnings.append("SESSION_COOKIE_SECURE should be 'true' in production")
         
-        if cookie_httponly and cookie_httponly not in ('true', '1', 'yes', 'on'):
+        if cookie_httponly and cookie_httponly not in _TRUTHY:
             self.warnings.append("SESSION_COOKIE_HTTPONLY should be 'true' in production")
         
-        if cookie_samesite and cookie_samesite not in ('Strict', 'Lax', 'None'):
+        if cookie_samesite and cookie_samesite not in _SAMESITE:
             self.warnings.append(f"Invalid SESSION_COOKIE_SAMESITE value: {cookie_samesite}")
     
     def run_all_checks(self) -> Tuple[List[str], List[str], List[str]]:
@@ -260,19 +308,18 @@ Exit codes:
     
     args = parser.parse_args()
     
-    # Check dependencies
-    if args.env_file and not HAS_DOTENV:
+    # Run validation
+    try:
+        validator = ConfigValidator(args.env_file)
+    except ImportError:
         print("Error: python-dotenv not installed. Install with: pip install python-dotenv")
         sys.exit(2)
-    
-    # Run validation
-    validator = ConfigValidator(args.env_file)
     errors, warnings, info = validator.run_all_checks()
     
     if args.verbose:
         print("\nEnvironment Variables:")
         for var in ['SPOTIFY_CLIENT_ID', 'REDIRECT_URI', 'FLASK_ENV', 'SESSION_TYPE', 'REDIS_URL']:
-            value = os.getenv(var)
+            value = validator.env.get(var)
             if value:
                 if var in ['SPOTIFY_CLIENT_SECRET', 'FLASK_SECRET_KEY']:
                     print(f"  {var}: [REDACTED]")
@@ -14,10 +14,17 @@ Usage:
 
 import argparse
 import secrets
-import base64
+import binascii
 import string
 import sys
 
+# Alphanumeric keys map random bytes onto 62 characters; bytes at or above the largest
+# multiple of 62 are dropped so every character stays equally likely
+_ALPHANUMERIC = (string.ascii_letters + string.digits).encode('ascii')
+_ALPHANUMERIC_LIMIT = 256 - 256 % len(_ALPHANUMERIC)
+_ALPHANUMERIC_TABLE = bytes(_ALPHANUMERIC[b % len(_ALPHANUMERIC)] for b in range(256))
+_ALPHANUMERIC_REJECTED = bytes(range(_ALPHANUMERIC_LIMIT, 256))
+
 
 def generate_hex_key(length: int = 32) -> str:
     """Generate a hex-encoded secret key.
@@ -52,7 +59,7 @@ def generate_base64_key(length: int = 32) -> str:
     Returns:
         Base64-encoded secret key
     """
-    return base64.b64encode(secrets.token_bytes(length)).decode('ascii')
+    return binascii.b2a_base64(secrets.token_bytes(length), newline=False).decode('ascii')
 
 
 def generate_alphanumeric_key(length: int = 64) -> str:
@@ -64,8 +71,20 @@ def generate_alphanumeric_key(length: int = 64) -> str:
     Returns:
         Alphanumeric secret key
     """
-    alphabet = string.ascii_letters + string.digits
-    return ''.join(secrets.choice(alphabet) for _ in range(length))
+    key = b''
+    while len(key) < length:
+        # One CSPRNG read per round instead of one per character
+        key += secrets.token_bytes(length).translate(_ALPHANUMERIC_TABLE, _ALPHANUMERIC_REJECTED)
+    return key[:length].decode('ascii')
+
+
+# Key generator for each output format
+KEY_GENERATORS = {
+    'hex': generate_hex_key,
+    'base64': generate_base64_key,
+    'urlsafe': generate_urlsafe_key,
+    'alphanumeric': generate_alphanumeric_key,
+}
 
 
 def main():
@@ -105,7 +124,7 @@ Security Notes:
     
     parser.add_argument(
         '--format', '-f',
-        choices=['hex', 'base64', 'urlsafe', 'alphanumeric'],
+        choices=list(KEY_GENERATORS),
         default='hex',
         help='Output format (default: hex)'
     )
@@ -134,15 +153,9 @@ Security Notes:
         args.length = 64  # Default to 64 characters for alphanumeric
     
     # Generate keys
+    generate_key = KEY_GENERATORS[args.format]
     for i in range(args.count):
-        if args.format == 'hex':
-            key = generate_hex_key(args.length)
-        elif args.format == 'base64':
-            key = generate_base64_key(args.length)
-        elif args.format == 'urlsafe':
-            key = generate_urlsafe_key(args.length)
-        elif args.format == 'alphanumeric':
-            key = generate_alphanumeric_key(args.length)
+        key = generate_key(args.length)
         
         if args.env:
             print(f"FLASK_SECRET_KEY={key}")
@@ -4,17 +4,44 @@ Provides encrypted storage for OAuth tokens with Redis/session backend support.
 """
 
 import base64
-import json
 import logging
 import os
+from functools import lru_cache
 from typing import Any
 
-from cryptography.fernet import Fernet
+from cryptography.fernet import Fernet, InvalidToken
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 
+import json_codec
+
 logger = logging.getLogger(__name__)
 
+# Use a fixed salt for consistent key derivation
+# In production, you might want to store/retrieve this salt separately
+TOKEN_KEY_SALT = b'spotify_token_salt'
+
+# Session keys holding token data
+_TOKEN_KEYS = ('encrypted_token', 'token_expires_at', 'has_refresh_token')
+
+
+@lru_cache(maxsize=4)
+def _derive_fernet(secret_key: str, salt: bytes = TOKEN_KEY_SALT) -> Fernet:
+    """
+    Create Fernet instance from secret key using PBKDF2.
+
+    The derivation is deliberately slow (100,000 iterations) and its inputs are
+    fixed per deployment, so results are cached per (secret_key, salt).
+    """
+    kdf = PBKDF2HMAC(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=salt,
+        iterations=100000,
+    )
+    key = base64.urlsafe_b64encode(kdf.derive(secret_key.encode()))
+    return Fernet(key)
+
 
 class TokenEncryption:
     """Handles token encryption/decryption using Fernet symmetric encryption."""
@@ -26,22 +53,7 @@ class TokenEncryption:
         Args:
             secret_key: Base secret key for encryption (will be derived)
         """
-        self.fernet = self._create_fernet(secret_key)
-
-    def _create_fernet(self, secret_key: str) -> Fernet:
-        """Create Fernet instance from secret key using PBKDF2."""
-        # Use a fixed salt for consistent key derivation
-        # In production, you might want to store/retrieve this salt separately
-        salt = b'spotify_token_salt'
-
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=32,
-            salt=salt,
-            iterations=100000,
-        )
-        key = base64.urlsafe_b64encode(kdf.derive(secret_key.encode()))
-        return Fernet(key)
+        self.fernet = _derive_fernet(secret_key)
 
     def encrypt_token_data(self, token_data: dict[str, Any]) -> str:
         """
@@ -51,12 +63,12 @@ class TokenEncryption:
             token_data: Dictionary containing token information
             
         Returns:
-            Encrypted token data as base64 string
+            Encrypted token data as URL-safe base64 string (a Fernet token)
         """
         try:
-            json_data = json.dumps(token_data)
-            encrypted_data = self.fernet.encrypt(json_data.encode())
-            return base64.urlsafe_b64encode(encrypted_data).decode()
+            json_data = json_codec.dumps(token_data)
+            # Fernet tokens are already URL-safe base64
+            return self.fernet.encrypt(json_data).decode('ascii')
         except Exception as e:
             logger.error(f"Failed to encrypt token data: {e}")
             raise
@@ -66,15 +78,19 @@ class TokenEncryption:
         Decrypt token data.
         
         Args:
-            encrypted_data: Base64 encoded encrypted token data
+            encrypted_data: Fernet token, or a legacy base64-wrapped Fernet token
             
         Returns:
             Decrypted token data dictionary
         """
         try:
-            encrypted_bytes = base64.urlsafe_b64decode(encrypted_data.encode())
-            decrypted_data = self.fernet.decrypt(encrypted_bytes)
-            return json.loads(decrypted_data.decode())
+            encrypted_bytes = encrypted_data.encode()
+            try:
+                decrypted_data = self.fernet.decrypt(encrypted_bytes)
+            except InvalidToken:
+                # Tokens stored before the extra base64 layer was dropped
+                decrypted_data = self.fernet.decrypt(base64.urlsafe_b64decode(encrypted_bytes))
+            return json_codec.loads(decrypted_data)
         except Exception as e:
             logger.error(f"Failed to decrypt token data: {e}")
             raise
@@ -109,9 +125,14 @@ class SecureTokenStorage:
             if hasattr(session, 'permanent'):
                 session.permanent = True
 
-            # Store some metadata unencrypted for convenience
-            session['token_expires_at'] = token_info.get('expires_at')
-            session['has_refresh_token'] = bool(token_info.get('refresh_token'))
+            # Store some metadata unencrypted for convenience; unchanged values are not
+            # rewritten, so the session is not marked modified for them
+            expires_at = token_info.get('expires_at')
+            if session.get('token_expires_at') != expires_at or 'token_expires_at' not in session:
+                session['token_expires_at'] = expires_at
+            has_refresh_token = bool(token_info.get('refresh_token'))
+            if session.get('has_refresh_token') is not has_refresh_token:
+                session['has_refresh_token'] = has_refresh_token
 
             logger.debug("Token stored securely in session")
         except Exception as e:
@@ -139,9 +160,8 @@ class SecureTokenStorage:
         except Exception as e:
             logger.warning(f"Failed to retrieve token from session: {e}")
             # Clear invalid token data
-            session.pop('encrypted_token', None)
-            session.pop('token_expires_at', None)
-            session.pop('has_refresh_token', None)
+            for key in _TOKEN_KEYS:
+                session.pop(key, None)
             return None
 
     def update_token_in_session(self, session: dict, token_info: dict[str, Any]) -> None:
@@ -161,15 +181,17 @@ class SecureTokenStorage:
         Args:
             session: Flask session object
         """
-        session.pop('encrypted_token', None)
-        session.pop('token_expires_at', None)
-        session.pop('has_refresh_token', None)
+        for key in _TOKEN_KEYS:
+            session.pop(key, None)
         logger.debug("Token data cleared from session")
 
 
 def create_secure_token_storage(secret_key: str | None = None) -> SecureTokenStorage:
     """
-    Factory function to create secure token storage instance.
+    Factory function to get the secure token storage instance for a secret key.
+    
+    Instances are shared per secret key for the life of the process; call
+    clear_secure_token_storage_cache() after rotating the key.
     
     Args:
         secret_key: Optional secret key, defaults to FLASK_SECRET_KEY env var
@@ -182,4 +204,16 @@ def create_secure_token_storage(secret_key: str | None = None) -> SecureTokenSto
         if not secret_key:
             raise ValueError("FLASK_SECRET_KEY environment variable must be set for secure token storage")
 
+    return _storage_for_secret(secret_key)
+
+
+@lru_cache(maxsize=4)
+def _storage_for_secret(secret_key: str) -> SecureTokenStorage:
+    """Create the shared SecureTokenStorage instance for a secret key."""
     return SecureTokenStorage(secret_key)
+
+
+def clear_secure_token_storage_cache() -> None:
+    """Drop cached storage instances and derived keys, e.g. after key rotation."""
+    _storage_for_secret.cache_clear()
+    _derive_fernet.cache_clear()
@@ -1,4 +1,33 @@
+from functools import lru_cache
+from operator import itemgetter
+
+from position_tracker import PositionTracker
 from rate_limiter import rate_limited_call
+from spotify_auth import get_playlist_items
+
+
+@lru_cache(maxsize=4096)
+def release_date_key(release_date):
+    """
+    Build a sort key for a Spotify release date.
+
+    Tracks of one album share a release date, so keys are cached per date string.
+
+    Args:
+        release_date: Date as "YYYY", "YYYY-MM" or "YYYY-MM-DD"
+
+    Returns:
+        Tuple of (year, month, day), with missing parts as 1 and unparseable dates as (0, 1, 1)
+    """
+    parts = release_date.split("-")
+    try:
+        return (
+            int(parts[0]),
+            int(parts[1]) if len(parts) > 1 else 1,
+            int(parts[2]) if len(parts) > 2 else 1,
+        )
+    except ValueError:
+        return (0, 1, 1)
 
 
 def sort_playlist_by_release_date(sp, playlist_id, reverse=True):
@@ -14,92 +43,81 @@ def sort_playlist_by_release_date(sp, playlist_id, reverse=True):
         Number of reorder operations performed
     """
 
-    # Get all tracks from the playlist with rate limiting
-    tracks = []
-    results = rate_limited_call(sp.playlist_items, playlist_id, limit=100)
-    tracks.extend(results["items"])
-
-    # Handle playlists with more than 100 tracks
-    while results["next"]:
-        results = rate_limited_call(sp.next, results)
-        tracks.extend(results["items"])
+    # Get all tracks from the playlist with rate limiting (pages fetched in parallel)
+    tracks = get_playlist_items(sp, playlist_id)
 
     # Extract track info with release dates and current positions
     track_data = []
+    append = track_data.append
     for i, item in enumerate(tracks):
-        if item["track"] and item["track"]["album"]:
-            track = item["track"]
-            album = track["album"]
-
-            # Get release date (use release_date_precision to handle partial dates)
-            release_date = album["release_date"]
-            precision = album.get("release_date_precision", "day")
-
-            # Normalize dates to handle different precisions
-            if precision == "year":
-                release_date += "-01-01"
-            elif precision == "month":
-                release_date += "-01"
-
-            track_data.append(
-                {
-                    "position": i,
-                    "release_date": release_date,
-                    "name": track["name"],
-                    "artist": track["artists"][0]["name"] if track["artists"] else "Unknown",
-                    "uri": track["uri"],
-                }
-            )
+        track = item["track"]
+        if not track:
+            continue
+        album = track["album"]
+        if not album:
+            continue
+
+        # Partial dates sort as the first day of their year or month
+        release_date = album["release_date"]
+        artists = track["artists"]
+        append(
+            {
+                "position": i,
+                "release_date": release_date,
+                "release_key": release_date_key(release_date),
+                "name": track["name"],
+                "artist": artists[0]["name"] if artists else "Unknown",
+                "uri": track["uri"],
+            }
+        )
 
     # Sort by release date
-    sorted_tracks = sorted(track_data, key=lambda x: x["release_date"], reverse=reverse)
+    sorted_tracks = sorted(track_data, key=itemgetter("release_key"), reverse=reverse)
 
-    # Calculate the new order
-    new_positions = {track["position"]: i for i, track in enumerate(sorted_tracks)}
+    # Already sorted, with any undated items at the end: nothing to move
+    if all(track["position"] == i for i, track in enumerate(sorted_tracks)):
+        return 0
 
-    # Optimize reordering to minimize API calls
+    # Place tracks front to back: once k tracks are placed, the first k slots hold the
+    # sorted prefix and every other item keeps its original relative order behind it, so
+    # an item's live position is k plus the number of unplaced items before it
+    unplaced = PositionTracker(len(tracks))
     reorder_count = 0
-    processed = set()
-
-    for current_pos in range(len(track_data)):
-        if current_pos in processed:
-            continue
-
-        # Find where this track should go
-        target_pos = new_positions[current_pos]
+    next_track = 0
+
+    while next_track < len(sorted_tracks):
+        target_pos = unplaced.excluded_count
+        current_pos = target_pos + unplaced.current_position(sorted_tracks[next_track]["position"])
+
+        # Tracks that follow each other in both the sorted and the current order move as one block
+        block_end = next_track + 1
+        while (
+            block_end < len(sorted_tracks)
+            and target_pos + unplaced.current_position(sorted_tracks[block_end]["position"])
+            == current_pos + block_end - next_track
+        ):
+            block_end += 1
+        block = sorted_tracks[next_track:block_end]
+        next_track = block_end
 
         if current_pos != target_pos:
-            # Use playlist_reorder_items to move the track
+            # Use playlist_reorder_items to move the block
             try:
                 rate_limited_call(
                     sp.playlist_reorder_items,
                     playlist_id,
                     range_start=current_pos,
                     insert_before=target_pos,
-                    range_length=1,
+                    range_length=len(block),
                 )
                 reorder_count += 1
-
-                # Update our tracking after the move
-                # When moving forward, positions shift
-                if target_pos > current_pos:
-                    for i in range(current_pos + 1, target_pos + 1):
-                        for pos, new_pos in new_positions.items():
-                            if new_pos == i:
-                                new_positions[pos] = i - 1
-                    new_positions[current_pos] = target_pos
-                else:
-                    # When moving backward, positions shift differently
-                    for i in range(target_pos, current_pos):
-                        for pos, new_pos in new_positions.items():
-                            if new_pos == i:
-                                new_positions[pos] = i + 1
-                    new_positions[current_pos] = target_pos
-
-                processed.add(current_pos)
-
             except Exception as e:
-                print(f"Error reordering track at position {current_pos}: {e}")
+                # The block stays among the unplaced items; the next track takes this slot
+                print(f"Error reordering tracks at position {current_pos}: {e}")
+                continue
+
+        for track in block:
+            unplaced.exclude(track["position"])
 
     return reorder_count
 
@@ -111,57 +129,79 @@ def batch_sort_playlist(sp, playlist_id, reverse=True):
     and moving tracks in an optimized order.
     """
 
-    # Get all tracks with rate limiting
-    tracks = []
-    results = rate_limited_call(sp.playlist_items, playlist_id, limit=100)
-    tracks.extend(results["items"])
-
-    while results["next"]:
-        results = rate_limited_call(sp.next, results)
-        tracks.extend(results["items"])
+    # Get all tracks with rate limiting (pages fetched in parallel)
+    tracks = get_playlist_items(sp, playlist_id)
 
     # Create track data with release dates
     track_data = []
+    append = track_data.append
     for i, item in enumerate(tracks):
-        if item["track"] and item["track"]["album"]:
-            track = item["track"]
-            album = track["album"]
-            release_date = album["release_date"]
-
-            # Handle different date precisions
-            if len(release_date) == 4:  # Year only
-                release_date += "-01-01"
-            elif len(release_date) == 7:  # Year-month
-                release_date += "-01"
+        track = item["track"]
+        if not track:
+            continue
+        album = track["album"]
+        if not album:
+            continue
 
-            track_data.append({"index": i, "release_date": release_date, "track": track})
+        # Handle different date precisions
+        release_date = album["release_date"]
+        append(
+            {
+                "index": i,
+                "release_date": release_date,
+                "release_key": release_date_key(release_date),
+                "track": track,
+            }
+        )
 
     # Sort by release date
+    # Indices are dense, so the sort key is a plain list lookup
+    release_keys = [entry["release_key"] for entry in track_data]
     sorted_indices = sorted(
-        range(len(track_data)), key=lambda i: track_data[i]["release_date"], reverse=reverse
+        range(len(release_keys)), key=release_keys.__getitem__, reverse=reverse
     )
 
-    # Build a sequence of moves to sort the playlist
+    # Reorder calls address positions in the whole playlist, including skipped items
+    sorted_positions = [track_data[i]["index"] for i in sorted_indices]
+
+    # Already sorted, with any skipped items at the end: nothing to move
+    if sorted_positions == list(range(len(sorted_positions))):
+        return 0
+
+    # Build a sequence of moves to sort the playlist. Each move brings the next tracks
+    # forward to the end of the sorted prefix, so the tracks not yet placed keep their
+    # original relative order behind it; tracks that follow each other in both the
+    # sorted and the current order move together as one block
     moves = []
-    current_positions = list(range(len(track_data)))
+    unplaced = PositionTracker(len(tracks))
+    target_pos = 0
+
+    while target_pos < len(sorted_positions):
+        current_pos = target_pos + unplaced.current_position(sorted_positions[target_pos])
+        block_end = target_pos + 1
+        while (
+            block_end < len(sorted_positions)
+            and target_pos + unplaced.current_position(sorted_positions[block_end])
+            == current_pos + block_end - target_pos
+        ):
+            block_end += 1
 
-    for target_pos, source_idx in enumerate(sorted_indices):
-        current_pos = current_positions.index(source_idx)
         if current_pos != target_pos:
-            moves.append((current_pos, target_pos))
-            # Update the position tracking
-            item = current_positions.pop(current_pos)
-            current_positions.insert(target_pos, item)
+            moves.append((current_pos, target_pos, block_end - target_pos))
+        # Update the position tracking
+        for position in sorted_positions[target_pos:block_end]:
+            unplaced.exclude(position)
+        target_pos = block_end
 
     # Execute the moves
-    for current_pos, target_pos in moves:
+    for current_pos, target_pos, range_length in moves:
         try:
             rate_limited_call(
                 sp.playlist_reorder_items,
                 playlist_id,
                 range_start=current_pos,
-                insert_before=target_pos + 1 if target_pos > current_pos else target_pos,
-                range_length=1,
+                insert_before=target_pos + range_length if target_pos > current_pos else target_pos,
+                range_length=range_length,
             )
         except Exception as e:
             print(f"Error moving track from {current_pos} to {target_pos}: {e}")
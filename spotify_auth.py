@@ -1,10 +1,37 @@
+import logging
 import os
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
 
 import spotipy
 
+import json_codec
 from rate_limiter import rate_limited_call
 from spotify_client import create_spotify_client, create_spotify_oauth
 
+# Page size for playlist item requests (Spotify API maximum)
+PLAYLIST_ITEMS_PAGE_SIZE = 100
+
+# Page size for the current user's playlist list (Spotify API maximum)
+USER_PLAYLISTS_PAGE_SIZE = 50
+
+# Number of pages fetched concurrently; the rate limiter still paces requests
+MAX_PARALLEL_PAGE_REQUESTS = 5
+
+# Seconds a user's playlist list is served from cache; mutations invalidate it sooner
+USER_PLAYLISTS_CACHE_TTL = 60
+
+# Redis key prefix for cached playlist lists
+USER_PLAYLISTS_CACHE_PREFIX = "spotify-tools:playlists:"
+
+logger = logging.getLogger(__name__)
+
+_get_owner = itemgetter("owner")
+
+# Shared playlist cache backend; without one, playlist lists are not cached
+_user_playlists_redis = None
+
 
 def get_spotify_client(
     client_id: str | None = None,
@@ -60,6 +87,21 @@ def get_spotify_client(
     return create_spotify_client(auth_manager=auth_manager)
 
 
+def owned_playlists(items: Iterable[dict], owner_ids: frozenset[str]) -> Iterator[dict]:
+    """
+    Yield the playlists in a page whose owner is one of the given users.
+
+    Args:
+        items: Playlist objects from a playlist page
+        owner_ids: Spotify user IDs whose playlists are kept
+
+    Returns:
+        Iterator over the matching playlist dictionaries
+    """
+    get_owner = _get_owner
+    return (p for p in items if get_owner(p)["id"] in owner_ids)
+
+
 def get_user_playlists(sp: spotipy.Spotify) -> list:
     """
     Get all playlists owned by the authenticated user.
@@ -71,24 +113,147 @@ def get_user_playlists(sp: spotipy.Spotify) -> list:
         List of playlist dictionaries owned by the user
     """
     playlists = []
-    results = rate_limited_call(sp.current_user_playlists, limit=50)
+    results = rate_limited_call(sp.current_user_playlists, limit=USER_PLAYLISTS_PAGE_SIZE)
 
     # Get current user's ID to filter owned playlists
     current_user = rate_limited_call(sp.current_user)
-    user_id = current_user["id"]
+    owner_ids = frozenset((current_user["id"],))
+
+    # Filter for user-owned playlists only; extend() consumes the generator directly
+    playlists.extend(owned_playlists(results["items"], owner_ids))
+
+    if not results["next"]:
+        return playlists
+
+    def fetch_page(offset: int) -> list:
+        page = rate_limited_call(
+            sp.current_user_playlists, limit=USER_PLAYLISTS_PAGE_SIZE, offset=offset
+        )
+        return page["items"]
+
+    # The first page reports the total, so the remaining pages are requested in parallel
+    offsets = range(USER_PLAYLISTS_PAGE_SIZE, results["total"], USER_PLAYLISTS_PAGE_SIZE)
+    with ThreadPoolExecutor(max_workers=MAX_PARALLEL_PAGE_REQUESTS) as executor:
+        # map() yields pages in offset order regardless of completion order
+        add_playlists = playlists.extend
+        for page_items in executor.map(fetch_page, offsets):
+            add_playlists(owned_playlists(page_items, owner_ids))
+
+    return playlists
+
+
+def configure_user_playlists_cache(redis_client) -> None:
+    """
+    Share cached playlist lists across processes through Redis.
+
+    A per-process cache is deliberately not offered: invalidation after a mutation
+    would only reach the worker that handled it.
+
+    Args:
+        redis_client: Connected Redis client, or None to disable caching
+    """
+    global _user_playlists_redis
+    _user_playlists_redis = redis_client
+
+
+def get_cached_user_playlists(sp: spotipy.Spotify, user_id: str | None) -> list:
+    """
+    Get all playlists owned by the authenticated user, served from cache when fresh.
 
-    # Filter for user-owned playlists only
-    owned_playlists = [p for p in results["items"] if p["owner"]["id"] == user_id]
-    playlists.extend(owned_playlists)
+    Cached copies keep snapshot_id so the mutation endpoints can still detect
+    conflicting edits. The entry is dropped with invalidate_user_playlists after
+    the app modifies a playlist, and when a conflict shows a cached snapshot is
+    stale, so the next load fetches fresh snapshots.
 
-    while results["next"]:
-        results = rate_limited_call(sp.next, results)
-        owned_playlists = [p for p in results["items"] if p["owner"]["id"] == user_id]
-        playlists.extend(owned_playlists)
+    Args:
+        sp: Authenticated Spotipy client
+        user_id: Spotify ID of the authenticated user; None bypasses the cache
+
+    Returns:
+        List of playlist dictionaries owned by the user
+    """
+    if user_id is None or _user_playlists_redis is None:
+        return get_user_playlists(sp)
 
+    key = USER_PLAYLISTS_CACHE_PREFIX + user_id
+    try:
+        cached = _user_playlists_redis.get(key)
+        if cached is not None:
+            return json_codec.loads(cached)
+    except Exception as e:
+        logger.warning(f"Playlist cache read failed: {e}")
+
+    playlists = get_user_playlists(sp)
+    try:
+        _user_playlists_redis.setex(key, USER_PLAYLISTS_CACHE_TTL, json_codec.dumps(playlists))
+    except Exception as e:
+        logger.warning(f"Playlist cache write failed: {e}")
     return playlists
 
 
+def invalidate_user_playlists(user_id: str | None) -> None:
+    """
+    Drop a user's cached playlist list, e.g. after modifying one of their playlists
+    or finding that a cached snapshot_id is out of date.
+
+    Args:
+        user_id: Spotify ID of the user; None is ignored
+    """
+    if user_id is None or _user_playlists_redis is None:
+        return
+
+    try:
+        _user_playlists_redis.delete(USER_PLAYLISTS_CACHE_PREFIX + user_id)
+    except Exception as e:
+        logger.warning(f"Playlist cache invalidation failed: {e}")
+
+
+def get_playlist_items(sp: spotipy.Spotify, playlist_id: str) -> list:
+    """
+    Get all items of a playlist in playlist order.
+
+    The first page reports the total item count, so the remaining pages are
+    requested in parallel by offset instead of following the "next" chain.
+
+    Args:
+        sp: Authenticated Spotipy client
+        playlist_id: Spotify playlist ID
+
+    Returns:
+        List of playlist item dictionaries
+    """
+    results = rate_limited_call(sp.playlist_items, playlist_id, limit=PLAYLIST_ITEMS_PAGE_SIZE)
+    first_page = results["items"]
+
+    if not results["next"]:
+        return list(first_page)
+
+    # The total is known up front, so the list is allocated once and filled page by page
+    total = results["total"]
+    items = [None] * max(total, len(first_page))
+    items[:len(first_page)] = first_page
+    filled = len(first_page)
+
+    def fetch_page(offset: int) -> list:
+        page = rate_limited_call(
+            sp.playlist_items, playlist_id, limit=PLAYLIST_ITEMS_PAGE_SIZE, offset=offset
+        )
+        return page["items"]
+
+    offsets = range(PLAYLIST_ITEMS_PAGE_SIZE, total, PLAYLIST_ITEMS_PAGE_SIZE)
+    with ThreadPoolExecutor(max_workers=MAX_PARALLEL_PAGE_REQUESTS) as executor:
+        # map() yields pages in offset order regardless of completion order
+        for offset, page_items in zip(offsets, executor.map(fetch_page, offsets), strict=True):
+            items[offset:offset + len(page_items)] = page_items
+            filled += len(page_items)
+
+    if filled < len(items):
+        # The playlist shrank while paging; close the gaps left by short pages
+        items = [item for item in items if item is not None]
+
+    return items
+
+
 def get_playlist_by_name(sp: spotipy.Spotify, playlist_name: str) -> dict | None:
     """
     Get a playlist by name for the authenticated user.
@@ -100,10 +265,14 @@ def get_playlist_by_name(sp: spotipy.Spotify, playlist_name: str) -> dict | None
     Returns:
         Playlist dictionary if found, None otherwise
     """
-    playlists = get_user_playlists(sp)
+    owner_ids = frozenset((rate_limited_call(sp.current_user)["id"],))
+    results = rate_limited_call(sp.current_user_playlists, limit=USER_PLAYLISTS_PAGE_SIZE)
 
-    for playlist in playlists:
-        if playlist["name"] == playlist_name:
-            return playlist
+    # Pages are fetched one at a time so the search stops at the first match
+    while results:
+        for playlist in owned_playlists(results["items"], owner_ids):
+            if playlist["name"] == playlist_name:
+                return playlist
+        results = rate_limited_call(sp.next, results) if results["next"] else None
 
     return None
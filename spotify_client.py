@@ -1,7 +1,39 @@
 
+import socket
+import threading
+from http.cookiejar import DefaultCookiePolicy
+
 import requests
 import spotipy
+from requests.adapters import HTTPAdapter
 from spotipy.oauth2 import SpotifyOAuth
+from urllib3.connection import HTTPConnection
+
+# Connection pool sizing for the shared session (api.spotify.com + accounts.spotify.com)
+SHARED_POOL_CONNECTIONS = 4
+SHARED_POOL_MAXSIZE = 32
+
+# TCP keepalive for pooled connections, so idle connections are not silently dropped
+# by NATs/load balancers and then re-established with a fresh TLS handshake
+KEEPALIVE_IDLE_SECONDS = 60
+KEEPALIVE_SOCKET_OPTIONS = [
+    *HTTPConnection.default_socket_options,
+    (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+]
+if hasattr(socket, "TCP_KEEPIDLE"):
+    KEEPALIVE_SOCKET_OPTIONS.append((socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, KEEPALIVE_IDLE_SECONDS))
+
+# Process-wide session created on first use, so TLS connections are reused across clients
+_shared_session: requests.Session | None = None
+_shared_session_lock = threading.Lock()
+
+
+class KeepAliveHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose pooled connections enable TCP keepalive."""
+
+    def init_poolmanager(self, *args, **pool_kwargs):
+        pool_kwargs.setdefault("socket_options", KEEPALIVE_SOCKET_OPTIONS)
+        super().init_poolmanager(*args, **pool_kwargs)
 
 
 def create_spotify_session() -> requests.Session:
@@ -22,6 +54,33 @@ def create_spotify_session() -> requests.Session:
     return session
 
 
+def get_shared_session() -> requests.Session:
+    """
+    Get the process-wide requests session shared by all Spotify clients.
+    
+    The session is created once with a larger connection pool; it never stores
+    cookies, since requests for different users go through it.
+    
+    Returns:
+        Shared requests session with User-Agent header
+    """
+    global _shared_session
+
+    if _shared_session is not None:
+        return _shared_session
+
+    with _shared_session_lock:
+        if _shared_session is None:
+            session = create_spotify_session()
+            session.mount("https://", KeepAliveHTTPAdapter(
+                pool_connections=SHARED_POOL_CONNECTIONS,
+                pool_maxsize=SHARED_POOL_MAXSIZE
+            ))
+            session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+            _shared_session = session
+        return _shared_session
+
+
 def create_spotify_client(
     access_token: str | None = None,
     auth_manager: SpotifyOAuth | None = None,
@@ -33,13 +92,13 @@ def create_spotify_client(
     Args:
         access_token: OAuth access token for authenticated requests
         auth_manager: SpotifyOAuth manager for token handling
-        requests_session: Custom requests session (if None, creates one with User-Agent)
+        requests_session: Custom requests session (if None, uses the shared session)
     
     Returns:
         Configured Spotify client with User-Agent header
     """
     if requests_session is None:
-        requests_session = create_spotify_session()
+        requests_session = get_shared_session()
 
     return spotipy.Spotify(
         auth=access_token,
@@ -69,13 +128,13 @@ def create_spotify_oauth(
         state: State parameter for CSRF protection
         cache_handler: Token cache handler (for web apps)
         cache_path: Token cache file path (for CLI apps)
-        requests_session: Custom requests session (if None, creates one with User-Agent)
+        requests_session: Custom requests session (if None, uses the shared session)
     
     Returns:
         Configured SpotifyOAuth with User-Agent header
     """
     if requests_session is None:
-        requests_session = create_spotify_session()
+        requests_session = get_shared_session()
 
     # Build kwargs based on what's provided
     oauth_kwargs = {
@@ -1,13 +1,20 @@
+import hashlib
 import logging
 import os
 import re
 import secrets
-from datetime import timedelta
-from functools import wraps
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from functools import lru_cache, wraps
 
 from dotenv import load_dotenv
 from flask import Flask, jsonify, redirect, render_template, request, session, url_for
+from flask.json.provider import DefaultJSONProvider
 
+import json_codec
 from error_handler import get_user_friendly_error, log_error_with_context, is_spotify_api_available
 from flask_session import Session
 from rate_limiter import SpotifyRateLimiter, rate_limited_call
@@ -15,8 +22,13 @@ from redis_oauth_store import create_oauth_state_store
 from remove_duplicates_from_playlist import remove_duplicates_from_playlist
 from secure_token_storage import create_secure_token_storage
 from sort_playlist_by_release_date import batch_sort_playlist
-from spotify_auth import get_user_playlists
+from spotify_auth import (
+    configure_user_playlists_cache,
+    get_cached_user_playlists,
+    invalidate_user_playlists,
+)
 from spotipy.cache_handler import MemoryCacheHandler
+from spotipy.exceptions import SpotifyException
 from spotify_client import create_spotify_client, create_spotify_oauth
 
 # Load environment variables first
@@ -47,7 +59,24 @@ if os.getenv('PORT') and not RENDER:
     RENDER = True
     os.environ['RENDER'] = 'true'
 
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson, keeping the default provider's options"""
+
+    def dumps(self, obj, **kwargs):
+        return json_codec.dumps(
+            obj,
+            sort_keys=kwargs.get('sort_keys', self.sort_keys),
+            indent=bool(kwargs.get('indent')),
+            default=kwargs.get('default', self.default),
+        ).decode()
+
+    def loads(self, s, **kwargs):
+        return json_codec.loads(s)
+
 app = Flask(__name__)
+# Flask's own provider is already the stdlib one, so only swap it in for orjson
+if json_codec.HAS_ORJSON:
+    app.json = OrjsonProvider(app)
 
 # Persistent secret key management
 flask_secret_key = os.getenv('FLASK_SECRET_KEY')
@@ -103,6 +132,10 @@ if FLASK_ENV == 'production' or HTTPS_ONLY or RENDER:
 # Initialize Flask-Session
 Session(app)
 
+# Share cached playlist lists through the session Redis when there is one
+if app.config['SESSION_TYPE'] == 'redis':
+    configure_user_playlists_cache(app.config['SESSION_REDIS'])
+
 # OAuth configuration
 SPOTIFY_CLIENT_ID = os.getenv('SPOTIFY_CLIENT_ID')
 SPOTIFY_CLIENT_SECRET = os.getenv('SPOTIFY_CLIENT_SECRET')
@@ -118,12 +151,35 @@ if not SPOTIFY_CLIENT_ID or not SPOTIFY_CLIENT_SECRET:
 # OAuth state storage with Redis support and automatic fallback
 oauth_state_store = create_oauth_state_store()
 
+# OAuth states are stored off the request thread; the user is at Spotify long before
+# the callback needs them, and callback retries briefly for the rare slow write
+OAUTH_STATE_TTL = 600
+OAUTH_STATE_LOOKUP_ATTEMPTS = 3
+OAUTH_STATE_LOOKUP_DELAY = 0.05
+background_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='oauth-state')
+
 # Global rate limiter instance
 rate_limiter = SpotifyRateLimiter()
 
 # Secure token storage instance
 secure_token_storage = create_secure_token_storage(flask_secret_key)
 
+# Spotify clients for still-valid tokens, keyed by a hash of the encrypted session token,
+# so requests within a token's lifetime skip the decrypt
+TOKEN_CLIENT_CACHE_MAX = 1024
+TOKEN_EXPIRY_MARGIN = 30  # seconds before expiry that a cached client stops being reused
+_token_client_cache = OrderedDict()
+_token_client_cache_lock = threading.Lock()
+
+# Spotify playlist web URL; bare IDs are recognized with str methods instead
+PLAYLIST_URL_RE = re.compile(r'https://open\.spotify\.com/playlist/([a-zA-Z0-9]+)')
+
+# Longer inputs are rejected before parsing so they never enter the parse cache
+MAX_PLAYLIST_LINK_LENGTH = 256
+
+# Track fields returned in the post-sort preview
+SORTED_PREVIEW_FIELDS = 'items(track(name,artists(name),album(release_date)))'
+
 # Compliance safeguards
 PROHIBITED_ACTIVITIES = [
     'download', 'save_file', 'export_tracks', 'bulk_download',
@@ -141,37 +197,41 @@ def require_https(f):
         return f(*args, **kwargs)
     return decorated_function
 
-@app.before_request
-def force_https():
-    """Force HTTPS for all requests in production"""
-    if HTTPS_ONLY and not request.is_secure:
-        https_url = request.url.replace('http://', 'https://', 1)
-        return redirect(https_url, code=301)
+# Only registered when enforcing HTTPS, so other deployments skip the hook entirely
+if HTTPS_ONLY:
+    @app.before_request
+    def force_https():
+        """Force HTTPS for all requests in production"""
+        if not request.is_secure:
+            https_url = request.url.replace('http://', 'https://', 1)
+            return redirect(https_url, code=301)
+
+# Content Security Policy
+CONTENT_SECURITY_POLICY = (
+    "default-src 'self'; "
+    "script-src 'self' 'unsafe-inline' https://cdn.jsdelivr.net https://cdnjs.cloudflare.com; "
+    "style-src 'self' 'unsafe-inline' https://cdn.jsdelivr.net https://cdnjs.cloudflare.com https://fonts.googleapis.com; "
+    "img-src 'self' data: https:; "
+    "connect-src 'self' https://api.spotify.com; "
+    "font-src 'self' https://cdn.jsdelivr.net https://cdnjs.cloudflare.com https://fonts.gstatic.com;"
+)
+
+# Security headers for all environments, built once at startup
+SECURITY_HEADERS = {
+    'X-Content-Type-Options': 'nosniff',
+    'X-Frame-Options': 'DENY',
+    'X-XSS-Protection': '1; mode=block',
+    'Referrer-Policy': 'strict-origin-when-cross-origin',
+    'Content-Security-Policy': CONTENT_SECURITY_POLICY,
+}
+if FLASK_ENV == 'production' or HTTPS_ONLY:
+    # HTTP Strict Transport Security (HSTS)
+    SECURITY_HEADERS['Strict-Transport-Security'] = 'max-age=31536000; includeSubDomains'
 
 @app.after_request
 def apply_security_headers(response):
     """Apply security headers to all responses"""
-    if FLASK_ENV == 'production' or HTTPS_ONLY:
-        # HTTP Strict Transport Security (HSTS)
-        response.headers['Strict-Transport-Security'] = 'max-age=31536000; includeSubDomains'
-
-    # Security headers for all environments
-    response.headers['X-Content-Type-Options'] = 'nosniff'
-    response.headers['X-Frame-Options'] = 'DENY'
-    response.headers['X-XSS-Protection'] = '1; mode=block'
-    response.headers['Referrer-Policy'] = 'strict-origin-when-cross-origin'
-
-    # Content Security Policy
-    csp = (
-        "default-src 'self'; "
-        "script-src 'self' 'unsafe-inline' https://cdn.jsdelivr.net https://cdnjs.cloudflare.com; "
-        "style-src 'self' 'unsafe-inline' https://cdn.jsdelivr.net https://cdnjs.cloudflare.com https://fonts.googleapis.com; "
-        "img-src 'self' data: https:; "
-        "connect-src 'self' https://api.spotify.com; "
-        "font-src 'self' https://cdn.jsdelivr.net https://cdnjs.cloudflare.com https://fonts.gstatic.com;"
-    )
-    response.headers['Content-Security-Policy'] = csp
-
+    response.headers.update(SECURITY_HEADERS)
     return response
 
 def ensure_compliance():
@@ -182,8 +242,46 @@ def ensure_compliance():
     # No data is permanently stored, downloaded, or used for prohibited purposes
     pass
 
+def session_token_cache_key():
+    """Hash of the session's encrypted token, or None when there is no token"""
+    encrypted_token = session.get('encrypted_token')
+    if not encrypted_token:
+        return None
+    return hashlib.sha256(encrypted_token.encode()).hexdigest()
+
+def forget_cached_client():
+    """Drop the cached Spotify client for the session's current token"""
+    cache_key = session_token_cache_key()
+    if cache_key:
+        with _token_client_cache_lock:
+            _token_client_cache.pop(cache_key, None)
+
+def log_failed_state_write(future):
+    """Log a background OAuth state write that raised"""
+    error = future.exception()
+    if error:
+        logger.error(f"Failed to store OAuth state: {error}")
+
+def consume_oauth_state(state):
+    """Take a state out of the store, allowing a background write from /auth a moment to land"""
+    for attempt in range(OAUTH_STATE_LOOKUP_ATTEMPTS):
+        if oauth_state_store.pop_state(state):
+            return True
+        if attempt + 1 < OAUTH_STATE_LOOKUP_ATTEMPTS:
+            time.sleep(OAUTH_STATE_LOOKUP_DELAY)
+    return False
+
 def get_authenticated_spotify_client():
     """Get authenticated Spotify client, refreshing token if needed"""
+    # Reuse the client built for this token while it is comfortably within its lifetime
+    cache_key = session_token_cache_key()
+    if cache_key:
+        with _token_client_cache_lock:
+            cached = _token_client_cache.get(cache_key)
+            if cached and cached[0] > time.time() + TOKEN_EXPIRY_MARGIN:
+                _token_client_cache.move_to_end(cache_key)
+                return cached[1]
+
     # Try to get token from secure storage
     token_info = secure_token_storage.get_token_from_session(session)
     if not token_info:
@@ -192,7 +290,6 @@ def get_authenticated_spotify_client():
     try:
         # Check if token needs refresh
         if token_info.get('expires_at') and token_info.get('refresh_token'):
-            import time
             if time.time() > token_info['expires_at']:
                 # Token expired, refresh it
                 auth_manager = create_spotify_oauth(
@@ -209,13 +306,50 @@ def get_authenticated_spotify_client():
                 # Store updated token securely
                 secure_token_storage.update_token_in_session(session, token_info)
 
-        return create_spotify_client(access_token=token_info['access_token'])
+        sp = create_spotify_client(access_token=token_info['access_token'])
+
+        # Cache under the (possibly refreshed) stored token; expired entries are replaced here
+        expires_at = token_info.get('expires_at')
+        cache_key = session_token_cache_key()
+        if expires_at and cache_key:
+            with _token_client_cache_lock:
+                _token_client_cache[cache_key] = (expires_at, sp)
+                _token_client_cache.move_to_end(cache_key)
+                if len(_token_client_cache) > TOKEN_CLIENT_CACHE_MAX:
+                    _token_client_cache.popitem(last=False)
+
+        return sp
     except Exception:
         # Token refresh failed, clear session
+        forget_cached_client()
         secure_token_storage.clear_token_from_session(session)
         session.clear()
         return None
 
+def discard_session_if_unauthorized(error):
+    """Log the user out only when Spotify rejected the token; other failures keep the session"""
+    if isinstance(error, SpotifyException) and error.http_status == 401:
+        forget_cached_client()
+        secure_token_storage.clear_token_from_session(session)
+        session.clear()
+    else:
+        logger.warning(f"Failed to load Spotify profile, keeping session: {error}")
+
+def get_session_user(sp):
+    """Get the Spotify profile shown in page headers, fetching it once per session"""
+    user = session.get('user')
+    if user is None:
+        profile = rate_limited_call(sp.current_user)
+        user = {
+            'id': profile['id'],
+            'display_name': profile.get('display_name'),
+            'email': profile.get('email'),
+            'images': profile.get('images') or [],
+        }
+        session['user'] = user
+        session['user_id'] = user['id']
+    return user
+
 def extract_playlist_id_from_link(link):
     """
     Extract playlist ID from Spotify playlist URL or return playlist ID if already valid.
@@ -229,44 +363,56 @@ def extract_playlist_id_from_link(link):
         str: The playlist ID if valid URL format or valid playlist ID
         None: If invalid format
     """
-    link = link.strip()
+    if len(link) > MAX_PLAYLIST_LINK_LENGTH:
+        return None
+    return parse_playlist_link(link)
 
-    # Check for web URL pattern first
-    web_pattern = r'https://open\.spotify\.com/playlist/([a-zA-Z0-9]+)'
-    match = re.search(web_pattern, link)
-    if match:
-        return match.group(1)
+@lru_cache(maxsize=512)
+def parse_playlist_link(link):
+    """Parse a bounded-length playlist link; repeat inputs are served from cache"""
+    link = link.strip()
 
     # If it's already a playlist ID (22 characters, alphanumeric), return it
     # This handles dropdown selections which send the playlist ID directly
-    if re.match(r'^[a-zA-Z0-9]{22}$', link):
+    if len(link) == 22 and link.isascii() and link.isalnum():
         return link
 
+    # Check for web URL pattern
+    match = PLAYLIST_URL_RE.search(link)
+    if match:
+        return match.group(1)
+
     # Return None for invalid formats
     return None
 
-def validate_playlist_snapshot(sp, playlist_id, stored_snapshot_id):
+def validate_playlist_snapshot(sp, playlist_id, stored_snapshot_id, fields='snapshot_id,name'):
     """
     Validate that the playlist hasn't changed since we last fetched it.
     
+    The same request returns the playlist fields the caller needs, so endpoints
+    do not have to fetch the playlist a second time.
+    
     Args:
         sp: Authenticated Spotify client
         playlist_id: The playlist ID to check
-        stored_snapshot_id: The snapshot_id we have stored from previous fetch
+        stored_snapshot_id: The snapshot_id we have stored from previous fetch, or None to skip the check
+        fields: Playlist fields to fetch (must include snapshot_id)
         
     Returns:
-        tuple: (is_valid: bool, current_snapshot_id: str)
+        tuple: (is_valid: bool, current_snapshot_id: str, playlist: dict)
     """
     try:
-        # Fetch only the snapshot_id field to minimize API usage
-        playlist = rate_limited_call(sp.playlist, playlist_id, fields='snapshot_id')
-        current_snapshot_id = playlist.get('snapshot_id')
-        
-        is_valid = current_snapshot_id == stored_snapshot_id
-        return is_valid, current_snapshot_id
+        # Fetch only the requested fields to minimize API usage
+        playlist = rate_limited_call(sp.playlist, playlist_id, fields=fields)
     except Exception:
+        if stored_snapshot_id is None:
+            raise
         # If we can't validate, assume it's invalid to be safe
-        return False, None
+        return False, None, None
+
+    current_snapshot_id = playlist.get('snapshot_id')
+    is_valid = stored_snapshot_id is None or current_snapshot_id == stored_snapshot_id
+    return is_valid, current_snapshot_id, playlist
 
 @app.route('/')
 def index():
@@ -274,10 +420,10 @@ def index():
     sp = get_authenticated_spotify_client()
     if sp:
         try:
-            user = rate_limited_call(sp.current_user)
+            user = get_session_user(sp)
             return render_template('index.html', user=user)
-        except Exception:
-            session.clear()
+        except Exception as e:
+            discard_session_if_unauthorized(e)
 
     return render_template('index.html', user=None)
 
@@ -287,7 +433,9 @@ def auth():
     # Generate state parameter for CSRF protection
     state = secrets.token_urlsafe(32)
     session['oauth_state'] = state
-    oauth_state_store.set_state(state)
+    background_executor.submit(
+        oauth_state_store.set_state, state, ttl=OAUTH_STATE_TTL
+    ).add_done_callback(log_failed_state_write)
 
     # Create OAuth manager
     auth_manager = create_spotify_oauth(
@@ -320,12 +468,11 @@ def callback():
         return render_template('error.html', error=f'Spotify authentication error: {error}')
 
     # Validate state parameter
-    if not state or state != session.get('oauth_state') or not oauth_state_store.get_state(state):
+    if not state or state != session.get('oauth_state') or not consume_oauth_state(state):
         return render_template('error.html', error='Invalid state parameter. Please try again.')
 
-    # Clean up state
+    # Clean up state (the store entry was consumed by the check above)
     session.pop('oauth_state', None)
-    oauth_state_store.delete_state(state)
 
     if not code:
         return render_template('error.html', error='No authorization code received.')
@@ -350,6 +497,9 @@ def callback():
 
         # Store token securely in session
         secure_token_storage.store_token_in_session(session, token_info)
+        # The new token may belong to a different account than the cached profile
+        session.pop('user', None)
+        session.pop('user_id', None)
 
         return redirect(url_for('index'))
 
@@ -360,6 +510,7 @@ def callback():
 def logout():
     """Clear session and log out user with secure token cleanup"""
     # Clear tokens securely
+    forget_cached_client()
     secure_token_storage.clear_token_from_session(session)
     # Clear entire session
     session.clear()
@@ -368,13 +519,11 @@ def logout():
 @app.route('/privacy')
 def privacy():
     """Privacy policy page"""
-    from datetime import datetime
     return render_template('privacy.html', current_date=datetime.now().strftime('%B %d, %Y'))
 
 @app.route('/terms')
 def terms():
     """Terms of service page"""
-    from datetime import datetime
     return render_template('terms.html', current_date=datetime.now().strftime('%B %d, %Y'))
 
 @app.route('/consent')
@@ -385,13 +534,11 @@ def consent():
 @app.route('/health')
 def health_check():
     """Health check endpoint for load balancers"""
-    from datetime import datetime
     return jsonify({'status': 'healthy', 'timestamp': str(datetime.now())})
 
 @app.route('/ready')
 def readiness_check():
     """Readiness check endpoint for Kubernetes/deployment"""
-    from datetime import datetime
     try:
         # Check if we can connect to OAuth state store
         test_state = 'health_check'
@@ -409,10 +556,10 @@ def sort_playlist_page():
         return redirect(url_for('index'))
 
     try:
-        user = rate_limited_call(sp.current_user)
+        user = get_session_user(sp)
         return render_template('sort_playlist.html', user=user)
-    except Exception:
-        session.clear()
+    except Exception as e:
+        discard_session_if_unauthorized(e)
         return redirect(url_for('index'))
 
 @app.route('/remove-duplicates')
@@ -423,10 +570,10 @@ def remove_duplicates_page():
         return redirect(url_for('index'))
 
     try:
-        user = rate_limited_call(sp.current_user)
+        user = get_session_user(sp)
         return render_template('remove_duplicates.html', user=user)
-    except Exception:
-        session.clear()
+    except Exception as e:
+        discard_session_if_unauthorized(e)
         return redirect(url_for('index'))
 
 @app.route('/api/sort-playlist', methods=['POST'])
@@ -452,24 +599,27 @@ def api_sort_playlist():
     reverse = sort_order == 'newest'
 
     try:
-        # Validate snapshot_id if provided
-        if stored_snapshot_id:
-            is_valid, current_snapshot_id = validate_playlist_snapshot(sp, playlist_id, stored_snapshot_id)
-            if not is_valid:
-                return jsonify({
-                    'error': 'This playlist has been modified since you loaded it. Please refresh the page and try again.',
-                    'conflict': True,
-                    'current_snapshot_id': current_snapshot_id
-                }), 409
-
-        # Get playlist info with rate limiting
-        playlist = rate_limited_call(sp.playlist, playlist_id)
+        # Get playlist info with rate limiting, validating snapshot_id if provided
+        is_valid, current_snapshot_id, playlist = validate_playlist_snapshot(
+            sp, playlist_id, stored_snapshot_id or None
+        )
+        if not is_valid:
+            # The client's snapshot may have come from the cached playlist list
+            invalidate_user_playlists(session.get('user_id'))
+            return jsonify({
+                'error': 'This playlist has been modified since you loaded it. Please refresh the page and try again.',
+                'conflict': True,
+                'current_snapshot_id': current_snapshot_id
+            }), 409
 
         # Sort playlist (batch_sort_playlist will use rate limiting internally)
         moves = batch_sort_playlist(sp, playlist_id, reverse=reverse)
+        invalidate_user_playlists(session.get('user_id'))
 
-        # Get first 10 tracks after sorting with rate limiting
-        results = rate_limited_call(sp.playlist_items, playlist_id, limit=10)
+        # Get first 10 tracks after sorting with rate limiting, fetching only the fields shown
+        results = rate_limited_call(
+            sp.playlist_items, playlist_id, fields=SORTED_PREVIEW_FIELDS, limit=10
+        )
         tracks = []
         if results and 'items' in results:
             for i, item in enumerate(results['items']):
@@ -527,20 +677,22 @@ def api_remove_duplicates():
         return jsonify({'error': 'Invalid playlist URL format. Please use a valid Spotify playlist URL (e.g., https://open.spotify.com/playlist/...)'}), 400
 
     try:
-        # Validate snapshot_id if provided
-        if stored_snapshot_id:
-            is_valid, current_snapshot_id = validate_playlist_snapshot(sp, playlist_id, stored_snapshot_id)
-            if not is_valid:
-                return jsonify({
-                    'error': 'This playlist has been modified since you loaded it. Please refresh the page and try again.',
-                    'conflict': True,
-                    'current_snapshot_id': current_snapshot_id
-                }), 409
-        # Get playlist info with rate limiting
-        playlist = rate_limited_call(sp.playlist, playlist_id)
+        # Get playlist info with rate limiting, validating snapshot_id if provided
+        is_valid, current_snapshot_id, playlist = validate_playlist_snapshot(
+            sp, playlist_id, stored_snapshot_id or None
+        )
+        if not is_valid:
+            # The client's snapshot may have come from the cached playlist list
+            invalidate_user_playlists(session.get('user_id'))
+            return jsonify({
+                'error': 'This playlist has been modified since you loaded it. Please refresh the page and try again.',
+                'conflict': True,
+                'current_snapshot_id': current_snapshot_id
+            }), 409
 
         # Remove duplicates (remove_duplicates_from_playlist will use rate limiting internally)
         stats = remove_duplicates_from_playlist(sp, playlist_id)
+        invalidate_user_playlists(session.get('user_id'))
 
         # Prepare response with removal strategy info
         response_data = {
@@ -586,8 +738,8 @@ def api_playlists():
     if not sp:
         return jsonify({'error': 'Not authenticated'}), 401
     try:
-        # get_user_playlists will use rate limiting internally
-        playlists = get_user_playlists(sp)
+        # Served from the per-user cache when fresh; otherwise fetched with rate limiting
+        playlists = get_cached_user_playlists(sp, session.get('user_id'))
         return jsonify({'playlists': playlists})
     except Exception as e:
         # Log error with context
@@ -606,6 +758,7 @@ def api_playlists():
         return jsonify(response), 500
 
 if __name__ == '__main__':
+    # Development server; production runs under gunicorn (see gunicorn_config.py)
     # Create templates directory if it doesn't exist
     os.makedirs('templates', exist_ok=True)
     os.makedirs('static', exist_ok=True)